@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Offline extraction benchmark for nur_dwn.py
+Replays saved Google result pages and landing pages without touching the network
+"""
+
+import os
+import sys
+import re
+import json
+import glob
+import time
+import logging
+import resource
+import inspect
+import tempfile
+import importlib.util
+from types import SimpleNamespace
+
+HREF_PATTERN = re.compile(r'href\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+ANCHOR_PATTERN = re.compile(r'<a\b', re.IGNORECASE)
+
+# Politeness pacing is not part of what we measure (only passed where the version accepts it;
+# older versions sleep directly, see silence_sleeps)
+ZERO_DELAYS = {'delay_range': (0, 0), 'per_host_delay': (0, 0), 'landing_page_delay': (0, 0)}
+
+def load_module(path):
+    """Import a nur_dwn.py from any path so two versions can be compared"""
+    spec = importlib.util.spec_from_file_location("nur_dwn_bench", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def silence_sleeps(module):
+    """Give the loaded module its own time namespace with a no-op sleep
+    
+    Versions before the politeness policy call time.sleep(random.uniform(1, 2))
+    directly; the process-wide time module is left alone.
+    """
+    module.time = SimpleNamespace(**{**vars(time), 'sleep': lambda seconds: None})
+
+def load_corpus(corpus_dir):
+    """Collect search pages (google_debug_*.html) and landing pages (landing_*.html)"""
+    def read(path):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    search_pages = {os.path.basename(p): read(p)
+                    for p in sorted(glob.glob(os.path.join(corpus_dir, "google_debug_*.html")))}
+    landing_pages = {os.path.basename(p): read(p)
+                     for p in sorted(glob.glob(os.path.join(corpus_dir, "landing_*.html")))}
+
+    # Optional urls.json maps landing fixture names to the URL they were saved from
+    landing_urls = {}
+    urls_file = os.path.join(corpus_dir, "urls.json")
+    if os.path.exists(urls_file):
+        with open(urls_file, 'r', encoding='utf-8') as f:
+            landing_urls = json.load(f)
+
+    return search_pages, landing_pages, landing_urls
+
+def make_offline_downloader(module, work_dir):
+    """Build a downloader whose network paths are disabled"""
+    params = inspect.signature(module.NursingPDFDownloader).parameters
+    delays = {name: value for name, value in ZERO_DELAYS.items() if name in params}
+    downloader = module.NursingPDFDownloader(download_dir=work_dir, **delays)
+    downloader.logger.setLevel(logging.CRITICAL)
+    downloader.update_progress = lambda *args, **kwargs: None
+
+    # Landing-page expansion must not go to the network while replaying search pages
+    downloader.extract_pdfs_from_page = lambda page_url: []
+    return downloader
+
+def close_downloader(downloader):
+    """Release what a benchmark downloader holds, including the log file handler it added"""
+    if hasattr(downloader, 'close'):
+        downloader.close()
+    for handler in list(downloader.logger.handlers):
+        downloader.logger.removeHandler(handler)
+        handler.close()
+
+def extract_search(module, downloader, html):
+    # Versions before the single-pass extractor take a BeautifulSoup tree
+    if hasattr(module, 'extract_links'):
+        return downloader.extract_google_pdf_links_fixed(html)
+    from bs4 import BeautifulSoup
+    return downloader.extract_google_pdf_links_fixed(BeautifulSoup(html, 'html.parser'))
+
+def extract_landing(module, downloader, html, page_url):
+    if hasattr(downloader, 'extract_pdfs_from_html'):
+        return downloader.extract_pdfs_from_html(html, page_url)
+
+    # Older versions only have the fetching method: serve the fixture from a fake session
+    class FixtureResponse:
+        status_code = 200
+        text = html
+
+    class FixtureSession:
+        def get(self, url, **kwargs):
+            return FixtureResponse()
+
+    downloader.session = FixtureSession()
+    return module.NursingPDFDownloader.extract_pdfs_from_page(downloader, page_url)
+
+def timed(func, repeat, setup=None, teardown=None):
+    """Best wall time over repeat runs, with the result of the last run
+    
+    setup() runs untimed before each run and its result is passed to func,
+    then to teardown() once the run is timed.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        if teardown:
+            teardown(*args)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_benchmark(module, corpus_dir, repeat):
+    search_pages, landing_pages, landing_urls = load_corpus(corpus_dir)
+    silence_sleeps(module)
+    with tempfile.TemporaryDirectory(prefix="nur_bench_") as work_dir:
+        return benchmark_stages(module, work_dir, search_pages, landing_pages, landing_urls, repeat)
+
+def benchmark_stages(module, work_dir, search_pages, landing_pages, landing_urls, repeat):
+    # A fresh downloader per run, so state such as expanded_pages does not carry over between repeats
+    def fresh_downloader():
+        return make_offline_downloader(module, work_dir)
+
+    results = {}
+    timings = {}
+
+    # Search result pages
+    anchors = sum(len(ANCHOR_PATTERN.findall(html)) for html in search_pages.values())
+    elapsed, found = timed(lambda d: {name: extract_search(module, d, html)
+                                      for name, html in search_pages.items()},
+                           repeat, fresh_downloader, close_downloader)
+    for name, links in found.items():
+        results[name] = sorted(set(links))
+    timings['search'] = {'pages': len(search_pages), 'anchors': anchors, 'seconds': elapsed}
+
+    # Landing pages
+    anchors = sum(len(ANCHOR_PATTERN.findall(html)) for html in landing_pages.values())
+    elapsed, found = timed(lambda d: {name: extract_landing(module, d, html,
+                                                            landing_urls.get(name, f"https://example.org/{name}"))
+                                      for name, html in landing_pages.items()},
+                           repeat, fresh_downloader, close_downloader)
+    for name, links in found.items():
+        results[name] = sorted(set(links))
+    timings['landing'] = {'pages': len(landing_pages), 'anchors': anchors, 'seconds': elapsed}
+
+    # URL helpers over every href in the corpus, looped so timings are not lost in noise
+    hrefs = [href for html in list(search_pages.values()) + list(landing_pages.values())
+             for href in HREF_PATTERN.findall(html)]
+    rounds = max(1, 100000 // max(1, len(hrefs)))
+    downloader = fresh_downloader()
+    for helper in ('extract_actual_url', 'is_pdf_link'):
+        func = getattr(downloader, helper)
+        elapsed, _ = timed(lambda: [func(href) for _ in range(rounds) for href in hrefs], repeat)
+        timings[helper] = {'urls': len(hrefs) * rounds, 'seconds': elapsed}
+    close_downloader(downloader)
+
+    return {
+        'module': os.path.abspath(module.__file__),
+        'results': results,
+        'timings': timings,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def rate(count, seconds):
+    return count / seconds if seconds else 0.0
+
+def print_report(report):
+    print("=== EXTRACTION BENCHMARK ===")
+    print(f"Module: {report['module']}")
+    for stage in ('search', 'landing'):
+        t = report['timings'][stage]
+        print(f"{stage:>8}: {t['pages']} pages in {t['seconds']:.3f}s | "
+              f"{rate(t['pages'], t['seconds']):.1f} pages/sec | "
+              f"{rate(t['anchors'], t['seconds']):.0f} links/sec")
+    for helper in ('extract_actual_url', 'is_pdf_link'):
+        t = report['timings'][helper]
+        print(f"{helper}: {t['urls']} urls | {rate(t['urls'], t['seconds']):.0f} urls/sec")
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+def compare_reports(baseline, report, max_slowdown):
+    """Print link-set differences and slowdowns; returns True if anything regressed"""
+    regressed = False
+
+    print("\n=== COMPARISON WITH BASELINE ===")
+    print(f"Baseline: {baseline['module']}")
+
+    for name in sorted(set(baseline['results']) | set(report['results'])):
+        old_links = set(baseline['results'].get(name, []))
+        new_links = set(report['results'].get(name, []))
+        if old_links == new_links:
+            continue
+        regressed = True
+        print(f"{name}: {len(old_links)} -> {len(new_links)} links")
+        for link in sorted(old_links - new_links):
+            print(f"  - {link}")
+        for link in sorted(new_links - old_links):
+            print(f"  + {link}")
+
+    for stage, t in report['timings'].items():
+        old = baseline['timings'].get(stage)
+        if not old or not old['seconds']:
+            continue
+        ratio = t['seconds'] / old['seconds']
+        flag = ""
+        if ratio > max_slowdown:
+            regressed = True
+            flag = "  <-- SLOWER"
+        print(f"{stage}: {old['seconds']:.3f}s -> {t['seconds']:.3f}s ({ratio:.2f}x){flag}")
+
+    print(f"Peak RSS: {baseline['peak_rss_mb']:.1f} MB -> {report['peak_rss_mb']:.1f} MB")
+    return regressed
+
+def main():
+    """Main function with CLI options"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline benchmark for nur_dwn.py link extraction")
+    parser.add_argument("corpus", help="Directory with google_debug_*.html and landing_*.html fixtures")
+    parser.add_argument("--module", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "nur_dwn.py"),
+                        help="nur_dwn.py version to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (best time is kept)")
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON report to diff against")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Fail when a stage is this many times slower than the baseline")
+
+    args = parser.parse_args()
+
+    module = load_module(args.module)
+    report = run_benchmark(module, args.corpus, args.repeat)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare_reports(baseline, report, args.max_slowdown):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -5,23 +5,46 @@ Key fixes for Google search result parsing and bot detection
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import time
 import random
 import os
 import urllib.parse
 from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from html.parser import HTMLParser
+
+# Optional: async engine (pip install httpx)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Optional: HTTP/2 for the async engine (pip install httpx[http2])
+try:
+    import h2
+except ImportError:
+    h2 = None
 import logging
 import sys
 from datetime import datetime
 import json
 import re
+import hashlib
+import zlib
+import threading
+import atexit
+import email.utils
+import asyncio
+from contextlib import contextmanager, asynccontextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from run_metrics import Metrics, THROUGHPUT_BUCKETS
 
 # Setup file logging
 def setup_file_logging(log_dir):
@@ -50,25 +73,1505 @@ def setup_file_logging(log_dir):
     
     return logger, log_file
 
+# Google result containers (div.g, div.tF2Cxc, div.MjjYud, div[data-sokoban-container], div[data-ved])
+RESULT_CONTAINER_CLASSES = {'g', 'tF2Cxc', 'MjjYud'}
+RESULT_CONTAINER_ATTRS = ('data-sokoban-container', 'data-ved')
+
+class ResultContainer:
+    """Text of one search result block, complete once the block has been parsed"""
+    __slots__ = ('parts', '_text')
+
+    def __init__(self):
+        self.parts = []
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = ''.join(self.parts).lower()
+        return self._text
+
+class LinkExtractor(HTMLParser):
+    """Single-pass tokenizer that collects (href, anchor_text, container) tuples"""
+
+    def __init__(self, link_tags=('a',)):
+        super().__init__(convert_charrefs=True)
+        self.link_tags = link_tags
+        self.meta_contents = []
+        self.containers = []
+        self._records = []
+        self._open_links = []
+        self._div_depth = 0
+        self._container = None
+        self._container_depth = 0
+        self._skip_depth = 0
+
+    @property
+    def links(self):
+        return [(href, ''.join(parts), container) for href, parts, container in self._records]
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'div':
+            self._div_depth += 1
+            # Track the outermost result container; nested ones add no new text
+            if self._container is None:
+                attr_map = dict(attrs)
+                classes = (attr_map.get('class') or '').split()
+                if (RESULT_CONTAINER_CLASSES.intersection(classes)
+                        or any(name in attr_map for name in RESULT_CONTAINER_ATTRS)):
+                    self._container = ResultContainer()
+                    self._container_depth = self._div_depth
+                    self.containers.append(self._container)
+        elif tag in self.link_tags:
+            href = dict(attrs).get('href')
+            if href is not None:
+                record = (href, [], self._container)
+                self._records.append(record)
+                self._open_links.append((tag, record[1]))
+        elif tag == 'meta':
+            content = dict(attrs).get('content')
+            if content:
+                self.meta_contents.append(content)
+        elif tag in ('script', 'style'):
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'div':
+            if self._container is not None and self._div_depth == self._container_depth:
+                self._container = None
+            self._div_depth = max(0, self._div_depth - 1)
+        elif tag in self.link_tags:
+            # Close the innermost open link of this tag
+            for i in range(len(self._open_links) - 1, -1, -1):
+                if self._open_links[i][0] == tag:
+                    del self._open_links[i]
+                    break
+        elif tag in ('script', 'style'):
+            self._skip_depth = max(0, self._skip_depth - 1)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._container is not None:
+            self._container.parts.append(data)
+        for _, parts in self._open_links:
+            parts.append(data)
+
+def extract_links(html, link_tags=('a',)):
+    """Parse html once and return the LinkExtractor holding its links and meta contents"""
+    extractor = LinkExtractor(link_tags)
+    extractor.feed(html)
+    extractor.close()
+    return extractor
+
+# Query parameters that only track clicks and never change the document, on any host
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', '_ga'}
+TRACKING_PREFIXES = ('utm_', 'mc_')
+
+# Google's own click parameters: only meaningless on Google hosts and /url? redirects
+GOOGLE_TRACKING_PARAMS = {
+    'ved', 'usg', 'sa', 'ei', 'oq', 'sqi', 'gs_lcp', 'sclient', 'rct', 'cd', 'cad'
+}
+GOOGLE_HOST = re.compile(r'(^|\.)google\.[a-z]{2,3}(\.[a-z]{2})?$')
+
+def normalize_url(url):
+    """Canonical form of a URL for duplicate detection (not for fetching)"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    if scheme == 'http':
+        scheme = 'https'  # Same document either way
+    
+    host = (parsed.hostname or '').lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+    
+    dropped = TRACKING_PARAMS
+    if GOOGLE_HOST.search(host) or parsed.path == '/url':
+        dropped = TRACKING_PARAMS | GOOGLE_TRACKING_PARAMS
+    
+    query = urllib.parse.urlencode(sorted(
+        (key, value) for key, value in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in dropped and not key.lower().startswith(TRACKING_PREFIXES)
+    ))
+    
+    # Path case is kept: most servers treat it as significant. Fragments are dropped.
+    return urllib.parse.urlunparse((scheme, netloc, parsed.path or '/', parsed.params, query, ''))
+
+class URLFrontier:
+    """Seen-set of canonical URLs, stored as short digests to stay compact"""
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url):
+        return hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=12).digest()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, url):
+        return self.key(url) in self._seen
+
+    def add(self, url):
+        """Record url; returns True if it had not been seen before"""
+        key = self.key(url)
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    def filter_new(self, urls):
+        """Record urls and return only the unseen ones, in order"""
+        return [url for url in urls if self.add(url)]
+
+# Default URL classification rules; pass a modified copy to NursingPDFDownloader(url_rules=...)
+DEFAULT_URL_RULES = {
+    # Substrings anywhere in the URL that mark a direct PDF link
+    'pdf_patterns': [
+        '.pdf', '/pdf/', '/pdfs/', '/documents/', '/download/',
+        'format=pdf', 'type=pdf', 'filetype=pdf'
+    ],
+    # Hosts (and their subdomains) that never hold PDFs worth crawling
+    'skip_domains': [
+        'google.com', 'youtube.com', 'facebook.com', 'twitter.com',
+        'instagram.com', 'linkedin.com', 'amazon.com', 'ebay.com'
+    ],
+    # Promising hosts: domain suffixes and single labels (edu matches .edu and .edu.au)
+    'page_domains': ['who.int', 'cdc.gov', 'nih.gov'],
+    'page_host_labels': ['edu', 'ac'],
+    # Promising substrings anywhere in the URL
+    'page_keywords': [
+        'repository', 'library', 'docs', 'publications', 'resources',
+        'nursing', 'medical', 'health', 'education',
+        'university', 'college', 'research', 'journal', 'ncbi', 'pubmed'
+    ]
+}
+
+class URLClassifier:
+    """URL rules compiled once: one regex per keyword list plus hostname-suffix sets"""
+
+    def __init__(self, rules=None):
+        rules = dict(DEFAULT_URL_RULES, **(rules or {}))
+        self.pdf_regex = self._compile(rules['pdf_patterns'])
+        self.page_regex = self._compile(rules['page_keywords'])
+        self.skip_domains = frozenset(d.lower().strip('.') for d in rules['skip_domains'])
+        self.page_domains = frozenset(d.lower().strip('.') for d in rules['page_domains'])
+        self.page_host_labels = frozenset(label.lower() for label in rules['page_host_labels'])
+
+    # scheme://[userinfo@]host - cheaper than urlparse for every anchor
+    host_regex = re.compile(r'[a-z][a-z0-9+.-]*://(?:[^@/?#]*@)?([^:/?#]*)')
+
+    @staticmethod
+    def _compile(patterns):
+        # Longest first so the alternation never stops at a shorter prefix
+        if not patterns:
+            return re.compile(r'(?!)')
+        return re.compile('|'.join(re.escape(p.lower()) for p in sorted(patterns, key=len, reverse=True)))
+
+    @staticmethod
+    def _host_suffixes(host):
+        labels = host.split('.')
+        return ['.'.join(labels[i:]) for i in range(len(labels))]
+
+    def is_pdf(self, url):
+        """Check if URL is likely a direct PDF link"""
+        return bool(url) and self.pdf_regex.search(url.lower()) is not None
+
+    def is_potential_page(self, url):
+        """Check if URL might contain PDFs"""
+        if not url:
+            return False
+        
+        url_lower = url.lower()
+        match = self.host_regex.match(url_lower)
+        host = match.group(1).rstrip('.') if match else ''
+        suffixes = self._host_suffixes(host) if host else []
+        
+        # Skip obviously non-PDF sites
+        if self.skip_domains.intersection(suffixes):
+            return False
+        
+        if self.page_domains.intersection(suffixes) or self.page_host_labels.intersection(host.split('.')):
+            return True
+        return self.page_regex.search(url_lower) is not None
+
+    def classify(self, url):
+        """'pdf', 'page' or None"""
+        if self.is_pdf(url):
+            return 'pdf'
+        if self.is_potential_page(url):
+            return 'page'
+        return None
+
+    def classify_batch(self, urls):
+        return [self.classify(url) for url in urls]
+
+class HostScheduler:
+    """Bounded worker pool that keeps per-host concurrency and spacing
+    
+    Spacing comes from a Politeness policy: a job only starts once its host is free,
+    so workers never sit in a sleep while other hosts have work ready.
+    """
+
+    def __init__(self, max_workers=4, per_host_limit=1, politeness=None, delay_range=None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.politeness = politeness
+        # Optional (min, max) gap overriding the policy's per-host default
+        self.delay_range = delay_range
+
+    def _call(self, func, args, url):
+        # The slot was booked when the job started; the fetch path must not wait again
+        self.politeness.local.prepaid = True
+        try:
+            return func(*args)
+        finally:
+            self.politeness.local.prepaid = False
+            # A slow job still leaves its host a full gap after it finishes
+            self.politeness.release(url, self.delay_range)
+
+    def run(self, jobs, deadline=None):
+        """Run (key, url, func, args) jobs and yield (key, future) as each finishes
+        
+        deadline is a time.monotonic() value; once it passes no new jobs start and
+        results still in flight are abandoned.
+        """
+        # Queue jobs per host, preserving submission order within a host
+        queues = {}
+        for job in jobs:
+            host = urlparse(job[1]).netloc.lower()
+            queues.setdefault(host, deque()).append(job)
+        
+        active = {}
+        running = {}
+        expired = False
+        
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while queues or running:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    expired = True
+                    break
+                wake_at = deadline
+                
+                # Start every job whose host has a free slot and has waited its gap
+                for host in list(queues):
+                    if len(running) >= self.max_workers:
+                        break
+                    if active.get(host, 0) >= self.per_host_limit:
+                        continue
+                    
+                    while (queues[host] and active.get(host, 0) < self.per_host_limit
+                           and len(running) < self.max_workers):
+                        key, url, func, args = queues[host][0]
+                        if self.politeness:
+                            ready_at = self.politeness.ready_at(url, self.delay_range)
+                            if ready_at > now:
+                                wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+                                break
+                            self.politeness.reserve(url, self.delay_range)
+                            future = pool.submit(self._call, func, args, url)
+                        else:
+                            future = pool.submit(func, *args)
+                        queues[host].popleft()
+                        active[host] = active.get(host, 0) + 1
+                        running[future] = (host, key)
+                    if not queues[host]:
+                        del queues[host]
+                
+                timeout = None if wake_at is None else max(0, wake_at - time.monotonic())
+                if not running:
+                    time.sleep(timeout or 0)
+                    continue
+                
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, key = running.pop(future)
+                    active[host] -= 1
+                    yield key, future
+        finally:
+            # Past the deadline, let in-flight requests time out on their own in the background
+            pool.shutdown(wait=not expired, cancel_futures=True)
+
+# Search endpoints are paced with delay_range and never checked against robots.txt
+SEARCH_HOSTS = ('www.google.com', 'google.com')
+
+class Politeness:
+    """robots.txt rules (incl. Crawl-delay) and a token bucket per host, shared by every fetch path"""
+
+    def __init__(self, user_agent='*', per_host_delay=(1, 3), burst=1, host_delays=None, max_crawl_delay=30):
+        self.user_agent = user_agent
+        self.per_host_delay = per_host_delay
+        self.burst = burst
+        # Per-host (min, max) overrides, e.g. slower pacing for the search engine
+        self.host_delays = dict(host_delays or {})
+        self.max_crawl_delay = max_crawl_delay
+        self.robots = {}         # robots.txt URL -> RobotFileParser, or None when there are no rules
+        self.robots_locks = {}
+        self.buckets = {}        # host -> theoretical arrival time of the next request
+        self.lock = threading.Lock()
+        # Set by HostScheduler on worker threads whose request slot is already booked
+        self.local = threading.local()
+        self.metrics = None
+
+    @staticmethod
+    def host(url):
+        return urlparse(url).netloc.lower()
+
+    def robots_url_for(self, url):
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc.lower()}/robots.txt"
+
+    def needs_robots(self, url):
+        """robots.txt URL still to be fetched for this url's host, or None"""
+        robots_url = self.robots_url_for(url)
+        return None if robots_url in self.robots else robots_url
+
+    def ensure_robots(self, url, fetch):
+        """Fetch robots.txt once per host with fetch(robots_url) -> (status, text)"""
+        robots_url = self.needs_robots(url)
+        if not robots_url:
+            return
+        with self.lock:
+            host_lock = self.robots_locks.setdefault(robots_url, threading.Lock())
+        with host_lock:
+            if robots_url not in self.robots:
+                self.set_robots(robots_url, *fetch(robots_url))
+
+    def set_robots(self, robots_url, status, text):
+        """Store fetched rules the way urllib.robotparser reads them:
+        401/403 disallow everything, other errors or an unreachable host allow everything"""
+        parser = RobotFileParser(robots_url)
+        if status in (401, 403):
+            parser.disallow_all = True
+        elif status == 200 and text:
+            parser.parse(text.splitlines())
+        else:
+            parser = None
+        self.robots[robots_url] = parser
+
+    def allowed(self, url):
+        parser = self.robots.get(self.robots_url_for(url))
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    def delay_range(self, host, base=None):
+        """(min, max) gap between requests to host, raised to its Crawl-delay"""
+        low, high = base or self.host_delays.get(host, self.per_host_delay)
+        for scheme in ('https', 'http'):
+            parser = self.robots.get(f"{scheme}://{host}/robots.txt")
+            crawl_delay = parser.crawl_delay(self.user_agent) if parser else None
+            if crawl_delay:
+                crawl_delay = min(float(crawl_delay), self.max_crawl_delay)
+                if crawl_delay > low:
+                    low, high = crawl_delay, max(high, crawl_delay)
+                break
+        return low, high
+
+    def ready_at(self, url, delay_range=None):
+        """time.monotonic() from which url's host takes its next request without waiting"""
+        host = self.host(url)
+        low, _ = self.delay_range(host, delay_range)
+        with self.lock:
+            arrival = self.buckets.get(host)
+        return 0 if arrival is None else arrival - (self.burst - 1) * low
+
+    def reserve(self, url, delay_range=None):
+        """Book the next slot for url's host; returns seconds to wait before sending"""
+        host = self.host(url)
+        low, high = self.delay_range(host, delay_range)
+        with self.lock:
+            now = time.monotonic()
+            arrival = max(self.buckets.get(host, now), now)
+            # Up to burst requests may go back to back, then one per interval
+            delay = max(0, arrival - (self.burst - 1) * low - now)
+            self.buckets[host] = arrival + random.uniform(low, high)
+        if self.metrics:
+            self.metrics.observe('politeness_wait_seconds', delay)
+        return delay
+
+    def release(self, url, delay_range=None):
+        """A request to url's host finished: its next request waits at least one gap from now"""
+        host = self.host(url)
+        low, high = self.delay_range(host, delay_range)
+        with self.lock:
+            after = time.monotonic() + random.uniform(low, high)
+            self.buckets[host] = max(self.buckets.get(host, after), after)
+
+    def wait(self, url, delay_range=None):
+        """Block only as long as this url's host requires"""
+        if getattr(self.local, 'prepaid', False):
+            self.local.prepaid = False  # Booked by HostScheduler before the job started
+            return
+        delay = self.reserve(url, delay_range)
+        if delay > 0:
+            time.sleep(delay)
+
+# Readers accept the %PDF- header anywhere in the first 1024 bytes
+PDF_MAGIC = b'%PDF-'
+PDF_HEADER_WINDOW = 1024
+
+def is_complete_pdf(path):
+    """Cheap check for a PDF header at the start and %%EOF near the end"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(PDF_HEADER_WINDOW)
+            f.seek(max(0, os.path.getsize(path) - 2048))
+            tail = f.read()
+    except OSError:
+        return False
+    return PDF_MAGIC in head and b'%%EOF' in tail
+
+def read_pdf_string(data, start):
+    """Decode the literal (...) or hex <...> string starting at data[start]"""
+    if data[start:start + 1] == b'<':
+        end = data.find(b'>', start)
+        digits = re.sub(rb'[^0-9A-Fa-f]', b'', data[start + 1:end]).decode('ascii')
+        raw = bytes.fromhex(digits + '0' * (len(digits) % 2))
+    else:
+        raw = bytearray()
+        depth = 0
+        i = start
+        escapes = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+        while i < len(data):
+            c = data[i:i + 1]
+            if c == b'\\':
+                nxt = data[i + 1:i + 2]
+                octal = re.match(rb'[0-7]{1,3}', data[i + 1:i + 4])
+                if octal:
+                    raw.append(int(octal.group(0), 8) & 0xFF)
+                    i += 1 + len(octal.group(0))
+                    continue
+                raw += escapes.get(nxt, nxt)
+                i += 2
+                continue
+            if c == b'(':
+                depth += 1
+                if depth == 1:
+                    i += 1
+                    continue
+            elif c == b')':
+                depth -= 1
+                if depth == 0:
+                    break
+            raw += c
+            i += 1
+        raw = bytes(raw)
+    
+    if raw.startswith(b'\xfe\xff'):
+        return raw[2:].decode('utf-16-be', errors='replace')
+    return raw.decode('latin-1')
+
+def read_object_streams(data):
+    """Map object number -> source for objects packed in Flate-compressed object streams"""
+    objects = {}
+    for match in re.finditer(rb'\bobj\b(.{0,1024}?)\bstream\r?\n', data, re.S):
+        dictionary = match.group(1)
+        if b'/ObjStm' not in dictionary or b'/FlateDecode' not in dictionary:
+            continue
+        count = re.search(rb'/N\s+(\d+)', dictionary)
+        first = re.search(rb'/First\s+(\d+)', dictionary)
+        if not count or not first:
+            continue
+        
+        end = data.find(b'endstream', match.end())
+        try:
+            body = zlib.decompressobj().decompress(data[match.end():end])
+        except zlib.error:
+            continue
+        
+        first = int(first.group(1))
+        header = body[:first].split()
+        offsets = [(int(header[i]), first + int(header[i + 1]))
+                   for i in range(0, min(len(header), 2 * int(count.group(1))) - 1, 2)]
+        for i, (number, start) in enumerate(offsets):
+            stop = offsets[i + 1][1] if i + 1 < len(offsets) else len(body)
+            objects[number] = body[start:stop]
+    return objects
+
+def read_pdf_metadata(path):
+    """Page count, title and encryption flag from the trailer/xref of a finished PDF"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    meta = {'version': None, 'pages': None, 'title': None, 'encrypted': False}
+    version = re.search(rb'%PDF-(\d\.\d)', data[:PDF_HEADER_WINDOW])
+    if version:
+        meta['version'] = version.group(1).decode('ascii')
+    
+    # Classic trailer dictionary, or the xref stream dictionary of PDF 1.5+ files
+    trailer = b''
+    trailer_at = data.rfind(b'trailer')
+    if trailer_at != -1:
+        trailer = data[trailer_at:data.find(b'startxref', trailer_at)]
+    else:
+        startxref = re.search(rb'startxref\s+(\d+)', data[-2048:])
+        if startxref:
+            offset = int(startxref.group(1))
+            trailer = data[offset:data.find(b'stream', offset)]
+    
+    compressed = None
+    
+    def find_object(ref):
+        nonlocal compressed
+        # Last definition wins, as with incremental updates
+        match = None
+        pattern = rb'(?<!\d)%s\s+%s\s+obj(.*?)endobj' % ref
+        for match in re.finditer(pattern, data, re.S):
+            pass
+        if match:
+            return match.group(1)
+        
+        # PDF 1.5+ keeps most dictionaries inside compressed object streams
+        if compressed is None:
+            compressed = read_object_streams(data)
+        return compressed.get(int(ref[0]), b'')
+    
+    def find_ref(source, key):
+        match = re.search(rb'/' + key + rb'\s+(\d+)\s+(\d+)\s+R', source)
+        return match.groups() if match else None
+    
+    meta['encrypted'] = b'/Encrypt' in trailer
+    
+    # Page count from the catalog's page tree, falling back to counting page objects
+    root = find_ref(trailer, b'Root')
+    pages_ref = find_ref(find_object(root), b'Pages') if root else None
+    count = re.search(rb'/Count\s+(\d+)', find_object(pages_ref)) if pages_ref else None
+    if count:
+        meta['pages'] = int(count.group(1))
+    else:
+        meta['pages'] = len(re.findall(rb'/Type\s*/Page(?![a-zA-Z])', data)) or None
+    
+    # Title strings are encrypted along with everything else
+    info = find_ref(trailer, b'Info')
+    if info and not meta['encrypted']:
+        info_obj = find_object(info)
+        title = re.search(rb'/Title\s*([(<])', info_obj)
+        if title:
+            meta['title'] = read_pdf_string(info_obj, title.start(1)).strip() or None
+    
+    return meta
+
+class BlobWriter:
+    """Resumable .part file that hashes PDF bytes as they are streamed in"""
+
+    def __init__(self, store, url):
+        self.store = store
+        self.url = url
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        self.part_path = os.path.join(store.tmp_dir, f"{key}.part")
+        self.meta_path = self.part_path + '.json'
+        self.meta = {}
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+        
+        # Pick up where an interrupted transfer of this URL left off
+        if os.path.exists(self.part_path) and os.path.exists(self.meta_path):
+            try:
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta.get('url') == url:
+                    with open(self.part_path, 'rb') as f:
+                        for block in iter(lambda: f.read(65536), b''):
+                            self.hasher.update(block)
+                            self.size += len(block)
+                            if len(self.head) < PDF_HEADER_WINDOW:
+                                self.head += block[:PDF_HEADER_WINDOW - len(self.head)]
+                    self.meta = meta
+            except (OSError, ValueError):
+                self.meta = {}
+        
+        self.file = open(self.part_path, 'ab' if self.meta else 'wb')
+
+    @property
+    def can_resume(self):
+        return self.size > 0 and self.meta.get('accept_ranges') == 'bytes'
+
+    def resume_headers(self):
+        """Range request for the missing tail, guarded so a changed file restarts"""
+        headers = {'Range': f"bytes={self.size}-"}
+        etag = self.meta.get('etag')
+        validator = etag if etag and not etag.startswith('W/') else self.meta.get('last_modified')
+        if validator:
+            headers['If-Range'] = validator
+        return headers
+
+    def start(self, response):
+        """Prepare for a response body: append on 206, start over otherwise"""
+        if response.status_code == 206:
+            return
+        self.restart()
+        self.meta = {
+            'url': self.url,
+            'accept_ranges': response.headers.get('Accept-Ranges', '').lower(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+
+    def restart(self):
+        """Throw away partial bytes and write from the beginning"""
+        self.file.seek(0)
+        self.file.truncate()
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+
+    def write(self, chunk):
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+        if len(self.head) < PDF_HEADER_WINDOW:
+            self.head += chunk[:PDF_HEADER_WINDOW - len(self.head)]
+        self.file.write(chunk)
+
+    def looks_like_pdf(self):
+        """True/False once the first bytes decide it, None while still undecided"""
+        if PDF_MAGIC in self.head:
+            return True
+        if len(self.head) >= PDF_HEADER_WINDOW:
+            return False
+        return None
+
+    def suspend(self):
+        """Keep the .part file so a later attempt can resume it"""
+        if not self.file.closed:
+            self.file.close()
+
+    def abort(self):
+        """Discard the partial download"""
+        self.suspend()
+        for path in (self.part_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def commit(self):
+        """Finish the download and move it into the store; returns the digest"""
+        self.file.close()
+        digest = self.store.add(self.part_path, self.hasher.hexdigest(), self.size, self.url)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+        return digest
+
+class PDFStore:
+    """Content-addressed PDF store: every unique file is kept once under its SHA-256"""
+
+    def __init__(self, root):
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.index_file = os.path.join(root, 'index.json')
+        self.lock = threading.Lock()
+        self.dirty = False  # Index changes not yet written (see flush)
+        
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        
+        # Index: digest -> blob info, url -> digest
+        self.index = {'blobs': {}, 'urls': {}}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.pdf")
+
+    def lookup_url(self, url):
+        """Return the digest already stored for this URL, if its blob still exists"""
+        with self.lock:
+            digest = self.index['urls'].get(url)
+        if digest and os.path.exists(self.blob_path(digest)):
+            return digest
+        return None
+
+    def open_writer(self, url):
+        return BlobWriter(self, url)
+
+    def add(self, tmp_path, digest, size, url):
+        """Move a finished download into the store, dropping it if the bytes are already there"""
+        blob_path = self.blob_path(digest)
+        with self.lock:
+            if os.path.exists(blob_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(tmp_path, blob_path)
+            
+            entry = self.index['blobs'].setdefault(digest, {'size': size, 'urls': [], 'names': []})
+            if url not in entry['urls']:
+                entry['urls'].append(url)
+            self.index['urls'][url] = digest
+            self.dirty = True
+        return digest
+
+    def set_metadata(self, digest, metadata):
+        """Record parsed PDF metadata for a blob"""
+        with self.lock:
+            entry = self.index['blobs'].setdefault(digest, {'size': 0, 'urls': [], 'names': []})
+            entry['pdf'] = metadata
+            self.dirty = True
+
+    def has_metadata(self, digest):
+        with self.lock:
+            return 'pdf' in self.index['blobs'].get(digest, {})
+
+    def is_duplicate(self, digest):
+        """True if the blob is referenced by more than one URL"""
+        with self.lock:
+            return len(self.index['blobs'].get(digest, {}).get('urls', [])) > 1
+
+    def link(self, digest, filepath):
+        """Point a query-specific filename at the blob (hardlink, symlink or index entry)"""
+        blob_path = self.blob_path(digest)
+        linked = False
+        for make_link in (os.link, os.symlink):
+            try:
+                make_link(os.path.abspath(blob_path), filepath)
+                linked = True
+                break
+            except FileExistsError:
+                linked = True
+                break
+            except OSError:
+                continue
+        
+        # Always record the name so the blob can be found even without a link on disk
+        with self.lock:
+            entry = self.index['blobs'].setdefault(digest, {'size': 0, 'urls': [], 'names': []})
+            name = os.path.basename(filepath)
+            if name not in entry['names']:
+                entry['names'].append(name)
+                self.dirty = True
+        return linked
+
+    def flush(self):
+        """Write the index once for a whole batch of adds, links and metadata updates
+        
+        Blobs are on disk before the index mentions them, so an index lost in a
+        crash only costs re-linking: a re-download lands on the same digest.
+        """
+        with self.lock:
+            if self.dirty:
+                self._save()
+
+    def _save(self):
+        """Write the index atomically (caller holds the lock)"""
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, separators=(',', ':'))
+        os.replace(tmp_file, self.index_file)
+        self.dirty = False
+
+class HTTPCache:
+    """On-disk URL cache that keeps ETag/Last-Modified validators for conditional requests"""
+
+    def __init__(self, root, max_bytes=200 * 1024 * 1024, max_entries=10000, ttl=7 * 24 * 3600):
+        self.root = root
+        self.body_dir = os.path.join(root, 'bodies')
+        self.index_file = os.path.join(root, 'index.json')
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries  # PDF validator entries have no body, so bytes alone do not bound the index
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.dirty = False  # Index changes not yet written (see flush)
+        
+        os.makedirs(self.body_dir, exist_ok=True)
+        
+        # Index: url key -> {url, etag, last_modified, encoding, size, digest, stored_at, last_used}
+        self.entries = {}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                pass
+        self.total_bytes = sum(entry['size'] for entry in self.entries.values())
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+    def body_path(self, key):
+        return os.path.join(self.body_dir, key)
+
+    def get(self, url):
+        """Return the cache entry for url, dropping it if it is older than the TTL"""
+        key = self.key(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            if time.time() - entry['stored_at'] > self.ttl:
+                self._remove(key)
+                self.dirty = True
+                return None
+            entry['last_used'] = time.time()
+            self.dirty = True
+            return dict(entry)
+
+    @staticmethod
+    def validators(entry):
+        """Conditional request headers for a cache entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_text(self, entry):
+        with open(self.body_path(self.key(entry['url'])), 'rb') as f:
+            return f.read().decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+    def put(self, url, headers, body=None, encoding=None, digest=None):
+        """Store validators (and optionally the body) for a 200 response"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return  # Nothing to revalidate with
+        
+        key = self.key(url)
+        if body is not None:
+            with open(self.body_path(key), 'wb') as f:
+                f.write(body)
+        with self.lock:
+            now = time.time()
+            old = self.entries.get(key)
+            if old:
+                self.total_bytes -= old['size']
+            self.entries[key] = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'encoding': encoding,
+                'size': len(body) if body is not None else 0,
+                'digest': digest,
+                'stored_at': now,
+                'last_used': now
+            }
+            self.total_bytes += self.entries[key]['size']
+            self.dirty = True
+            if self.total_bytes > self.max_bytes or len(self.entries) > self.max_entries:
+                self._evict()
+
+    def refresh(self, url, headers):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        key = self.key(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return
+            entry['etag'] = headers.get('ETag', entry['etag'])
+            entry['last_modified'] = headers.get('Last-Modified', entry['last_modified'])
+            entry['stored_at'] = entry['last_used'] = time.time()
+            self.dirty = True
+
+    def flush(self):
+        """Write the index once for a whole query's puts, refreshes and access times"""
+        with self.lock:
+            if self.dirty:
+                self._save()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones down to 90% of max_bytes and max_entries
+        
+        Called only once a limit is crossed; the slack keeps the next puts from sorting again.
+        """
+        expired = time.time() - self.ttl
+        for key in [k for k, entry in self.entries.items() if entry['stored_at'] < expired]:
+            self._remove(key)
+        
+        max_bytes = self.max_bytes * 0.9
+        max_entries = int(self.max_entries * 0.9)
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['last_used']):
+            if self.total_bytes <= max_bytes and len(self.entries) <= max_entries:
+                break
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.total_bytes -= entry['size']
+        try:
+            os.remove(self.body_path(key))
+        except OSError:
+            pass
+
+    def _save(self):
+        """Write the index atomically (caller holds the lock)"""
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_file, self.index_file)
+        self.dirty = False
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def backoff_delay(attempt, factor=0.5, cap=30):
+    """Exponential backoff with jitter so parallel workers do not retry in lockstep"""
+    base = min(cap, factor * (2 ** attempt))
+    return base / 2 + random.uniform(0, base / 2)
+
+def parse_retry_after(value, cap=120):
+    """Retry-After as seconds (delta or HTTP date), capped; None if absent or invalid"""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return min(cap, int(value))
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(cap, max(0, when.timestamp() - time.time()))
+
+class JitteredRetry(Retry):
+    """urllib3 Retry whose backoff is jittered (Retry-After is still honored first, capped)"""
+
+    def get_backoff_time(self):
+        base = super().get_backoff_time()
+        return base / 2 + random.uniform(0, base / 2) if base else 0
+
+    def get_retry_after(self, response):
+        # Same cap as RetryTransport, so a huge Retry-After cannot park a thread for hours
+        return parse_retry_after(response.headers.get('Retry-After'))
+
+class RetryTransport(httpx.AsyncBaseTransport if httpx else object):
+    """httpx transport that retries idempotent requests on RETRY_STATUSES, honoring Retry-After"""
+
+    def __init__(self, transport, retries=3, backoff_factor=0.5):
+        self.transport = transport
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+    async def handle_async_request(self, request):
+        attempt = 0
+        while True:
+            response = await self.transport.handle_async_request(request)
+            if (response.status_code not in RETRY_STATUSES or attempt >= self.retries
+                    or request.method not in ('GET', 'HEAD')):
+                return response
+            
+            # Only headers have been read, so dropping the body here is cheap
+            delay = parse_retry_after(response.headers.get('retry-after'))
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_factor)
+            await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class AsyncFetchEngine:
+    """httpx-based engine running page fetches and downloads on one event loop"""
+
+    def __init__(self, downloader, max_connections=100, per_host_limit=1, http2=False):
+        if httpx is None:
+            raise ImportError("The async engine needs httpx (pip install httpx)")
+        self.downloader = downloader
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.per_host_limit = per_host_limit
+        self.client = None
+        self.host_slots = {}
+        self.robots_locks = {}
+        # One event loop on its own thread keeps the client (and its connections) open between calls
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def logger(self):
+        return self.downloader.logger
+
+    def run(self, work):
+        """Run work(engine) on the engine's loop and wait for the result
+        
+        The loop lives on its own thread, so this also works when the caller
+        is itself inside a running event loop.
+        """
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, name="async-engine", daemon=True)
+                self.thread.start()
+                asyncio.run_coroutine_threadsafe(self.__aenter__(), self.loop).result()
+        return asyncio.run_coroutine_threadsafe(work(self), self.loop).result()
+
+    def close(self):
+        """Close the client and stop the loop thread"""
+        with self.lock:
+            if self.loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self.__aexit__(None, None, None), self.loop).result()
+            finally:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join()
+                self.loop.close()
+                self.loop = None
+                self.thread = None
+
+    async def __aenter__(self):
+        # httpx sets its own Accept-Encoding so it can decode whatever it advertises
+        headers = {k: v for k, v in self.downloader.session.headers.items() if k.lower() != 'accept-encoding'}
+        d = self.downloader
+        # HTTP/2 multiplexes many small fetches to one host over a single connection
+        transport = httpx.AsyncHTTPTransport(
+            http2=self.http2,
+            retries=d.max_retries,  # Connect failures
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections)
+        )
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            follow_redirects=True,
+            transport=RetryTransport(transport, d.max_retries, d.backoff_factor),
+            timeout=self.timeout(30)
+        )
+        self.host_slots = {}
+        self.robots_locks = {}
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    def timeout(self, read):
+        return httpx.Timeout(read, connect=self.downloader.connect_timeout)
+
+    @asynccontextmanager
+    async def host_slot(self, url, delay_range=None):
+        """Per-host concurrency limit and politeness wait that only delay this host's work"""
+        host = urlparse(url).netloc.lower()
+        slot = self.host_slots.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        async with slot:
+            politeness = self.downloader.politeness
+            delay = politeness.reserve(url, delay_range)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                yield
+            finally:
+                politeness.release(url, delay_range)
+
+    async def allowed_by_robots(self, url):
+        """Async counterpart of NursingPDFDownloader.allowed_by_robots"""
+        politeness = self.downloader.politeness
+        robots_url = politeness.needs_robots(url)
+        if robots_url:
+            lock = self.robots_locks.setdefault(robots_url, asyncio.Lock())
+            async with lock:
+                if politeness.needs_robots(url):
+                    try:
+                        status, text = await self.cached_fetch(robots_url, timeout=10)
+                    except Exception:
+                        status, text = None, None
+                    politeness.set_robots(robots_url, status, text)
+        
+        if politeness.allowed(url):
+            return True
+        self.logger.warning(f"Disallowed by robots.txt: {url}")
+        return False
+
+    async def cached_fetch(self, url, timeout=10):
+        """Async counterpart of NursingPDFDownloader.cached_fetch (cache file I/O runs off the loop)"""
+        cache = self.downloader.http_cache
+        entry = await asyncio.to_thread(cache.get, url)
+        headers = cache.validators(entry) if entry else {}
+        
+        response = await self.client.get(url, headers=headers, timeout=self.timeout(timeout))
+        if response.status_code == 304 and entry:
+            self.logger.info(f"Not modified, using cached page: {url}")
+            await asyncio.to_thread(cache.refresh, url, response.headers)
+            return 200, await asyncio.to_thread(cache.read_text, entry)
+        
+        if response.status_code != 200:
+            return response.status_code, None
+        
+        await asyncio.to_thread(cache.put, url, response.headers, body=response.content, encoding=response.encoding)
+        return 200, response.text
+
+    async def cached_get(self, url, timeout=10):
+        """Async counterpart of NursingPDFDownloader.cached_get"""
+        status, text = await self.cached_fetch(url, timeout)
+        return text
+
+    async def extract_pdfs_from_page(self, page_url):
+        """Extract PDF links from a specific page"""
+        try:
+            if not await self.allowed_by_robots(page_url):
+                return []
+            async with self.host_slot(page_url, self.downloader.landing_page_delay):
+                with self.downloader.metrics.timer('page_fetch_seconds'):
+                    page_text = await self.cached_get(page_url, timeout=10)
+            if page_text is None:
+                return []
+            # Parsing is CPU-bound; on the loop it would stall every transfer in flight
+            with self.downloader.metrics.timer('parse_seconds', page='landing'):
+                return await asyncio.to_thread(self.downloader.extract_pdfs_from_html, page_text, page_url)
+        
+        except Exception as e:
+            self.logger.error(f"Error extracting PDFs from {page_url}: {e}")
+            return []
+
+    async def expand_pages(self, page_urls, deadline):
+        """Extract PDFs from many landing pages concurrently; returns {page_url: pdf_links}"""
+        tasks = {asyncio.ensure_future(self.extract_pdfs_from_page(url)): url for url in page_urls}
+        if not tasks:
+            return {}
+        
+        done, pending = await asyncio.wait(tasks, timeout=max(0, deadline - time.monotonic()))
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.logger.warning(f"Landing page deadline reached, abandoned {len(pending)} pages")
+        return {tasks[task]: task.result() for task in done}
+
+    async def download_pdf(self, url, filename=None):
+        """Download a single PDF file with size checking"""
+        d = self.downloader
+        d.count('total_attempted')
+        self.logger.info(f"Attempting to download: {url}")
+        
+        try:
+            filename, filepath = d.target_path(url, filename)
+            
+            # File checks, store index writes and PDF parsing block, so they run off the loop
+            entry = await asyncio.to_thread(d.revalidation_entry, url)
+            if await asyncio.to_thread(d.link_existing, url, filename, filepath, entry):
+                return True
+            
+            if not await self.allowed_by_robots(url):
+                d.count('skipped_robots')
+                return False
+            
+            async with self.host_slot(url):
+                started = time.perf_counter()
+                # Resuming rehashes the whole .part file
+                writer = await asyncio.to_thread(d.store.open_writer, url)
+                try:
+                    for attempt in range(d.max_resume_attempts + 1):
+                        headers = d.request_headers(url, writer, entry)
+                        request_start = time.perf_counter()
+                        async with self.client.stream('GET', url, headers=headers, timeout=self.timeout(30)) as response:
+                            d.metrics.observe('download_headers_seconds', time.perf_counter() - request_start)
+                            if response.status_code == 304 and entry:
+                                await asyncio.to_thread(writer.abort)
+                                return await asyncio.to_thread(d.link_not_modified, url, filename, filepath,
+                                                               entry, response.headers)
+                            
+                            if response.status_code == 416:
+                                await asyncio.to_thread(writer.restart)
+                                writer.meta = {}
+                                continue
+                            
+                            response.raise_for_status()
+                            
+                            if not d.is_pdf_response(url, response.headers):
+                                await asyncio.to_thread(writer.abort)
+                                return False
+                            
+                            # Leaving the stream block closes the connection without reading the body
+                            size_ok, size_mb = d.size_from_headers(response.headers, response.status_code)
+                            if not size_ok:
+                                await asyncio.to_thread(writer.abort)
+                                d.log_too_large(url, size_mb)
+                                return False
+                            
+                            await asyncio.to_thread(writer.start, response)
+                            
+                            try:
+                                async for chunk in response.aiter_bytes(8192):
+                                    if not d.write_chunk(url, writer, chunk):
+                                        return False
+                            except httpx.TransportError as e:
+                                if writer.can_resume and attempt < d.max_resume_attempts:
+                                    self.logger.warning(f"Transfer interrupted at {writer.size} bytes ({e}): {url}")
+                                    continue
+                                raise
+                            final_headers = response.headers
+                        break
+                    else:
+                        raise IOError(f"Gave up after {d.max_resume_attempts} resume attempts")
+                    
+                    if not writer.looks_like_pdf():
+                        await asyncio.to_thread(d.reject_not_pdf, url, writer)
+                        return False
+                    digest = await asyncio.to_thread(writer.commit)
+                except Exception:
+                    await asyncio.to_thread(d.keep_or_drop_partial, writer)
+                    raise
+            
+            return await asyncio.to_thread(d.finish_download, url, filename, filepath, digest, writer.size,
+                                           final_headers, elapsed=time.perf_counter() - started)
+        
+        except Exception as e:
+            self.logger.error(f"Failed to download {url}: {e}")
+            d.count('failed_downloads')
+            return False
+
+# Single round-trip readiness check for a Google results page
+SEARCH_READY_SCRIPT = """
+    return document.readyState === 'complete' && !!document.querySelector(
+        '#search a[href], #rso a[href], div.g a[href], #captcha-form, form[action*="consent"]');
+"""
+
+class BrowserPool:
+    """Small pool of long-lived headless Chrome instances leased out per request"""
+
+    def __init__(self, options, size=1, max_uses=20):
+        self.options = options
+        self.size = size
+        self.max_uses = max_uses
+        self.closed = False
+        self._idle = []
+        self._uses = {}
+        self._created = 0
+        self._cond = threading.Condition()
+        # Never leave Chrome processes behind, even on an unhandled exception
+        atexit.register(self.close)
+
+    def _start_browser(self):
+        driver = webdriver.Chrome(options=self.options)
+        
+        try:
+            # Execute script to hide webdriver property
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        except Exception:
+            # Chrome is already running; quit it or _acquire would leak the process
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            raise
+        return driver
+
+    @staticmethod
+    def _healthy(driver):
+        """One cheap round-trip to check the browser still responds"""
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _acquire(self):
+        while True:
+            with self._cond:
+                while not self._idle and self._created >= self.size and not self.closed:
+                    self._cond.wait()
+                if self.closed:
+                    raise WebDriverException("Browser pool is closed")
+                driver = self._idle.pop() if self._idle else None
+                if driver is None:
+                    self._created += 1
+            
+            if driver is None:
+                try:
+                    driver = self._start_browser()
+                except Exception:
+                    self._discard(None)
+                    raise
+                self._uses[id(driver)] = 0
+                return driver
+            
+            if self._healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def _discard(self, driver):
+        """Quit a browser and free its slot"""
+        if driver is not None:
+            self._uses.pop(id(driver), None)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _release(self, driver, broken):
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        # Recycle after max_uses to keep Chrome's memory growth in check
+        if broken or self.closed or self._uses[id(driver)] >= self.max_uses:
+            self._discard(driver)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self):
+        """Borrow a browser for one request; it is returned (or quit) afterwards"""
+        driver = self._acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self._release(driver, broken)
+
+    def close(self):
+        """Quit every idle browser; leased ones are quit when returned"""
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._discard(driver)
+
+class ProgressRenderer:
+    """Single status line redrawn from a background thread, at most max_fps times per second
+    
+    update() only records the latest status, so workers never block on the terminal;
+    updates between redraws are coalesced. Output is off when the stream is not a TTY.
+    """
+
+    def __init__(self, render, stream=None, max_fps=4, width=120):
+        self.render = render          # render(status) -> progress line
+        self.stream = stream or sys.stdout
+        self.interval = 1.0 / max_fps
+        self.width = width
+        self.enabled = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.status = ""
+        self.drawn = 0                # Length of the line currently on screen
+        self.closed = False
+        self.thread = None
+        self.changed = threading.Event()
+        self.lock = threading.Lock()
+
+    def update(self, status=""):
+        self.status = status
+        if not self.enabled or self.closed:
+            return
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="progress", daemon=True)
+                    self.thread.start()
+        self.changed.set()
+
+    def _run(self):
+        while True:
+            self.changed.wait()
+            if self.closed:
+                return
+            self.changed.clear()
+            self._draw()
+            time.sleep(self.interval)
+
+    def _draw(self):
+        line = self.render(self.status)
+        # Truncate if too long
+        if len(line) > self.width:
+            line = line[:self.width - 3] + "..."
+        # One write: overwrite the old line and blank out whatever it left behind
+        self.stream.write('\r' + line + ' ' * max(0, self.drawn - len(line)))
+        self.stream.flush()
+        self.drawn = len(line)
+
+    def close(self):
+        """Stop the thread and leave the final status on its own line"""
+        if self.closed:
+            return
+        self.closed = True
+        self.changed.set()
+        if self.thread is not None:
+            self.thread.join()
+            self._draw()
+            self.stream.write('\n')
+            self.stream.flush()
+
 class NursingPDFDownloader:
-    def __init__(self, download_dir="nursing_certification_pdfs", delay_range=(2, 5), max_file_size_mb=10):
+    def __init__(self, download_dir="nursing_certification_pdfs", delay_range=(2, 5), max_file_size_mb=10,
+                 max_workers=4, per_host_limit=1, per_host_delay=(1, 3),
+                 cache_max_mb=200, cache_max_entries=10000, cache_ttl_days=7, max_resume_attempts=3,
+                 engine='threads', max_connections=100,
+                 max_landing_pages=8, landing_page_workers=4, landing_page_deadline=30, landing_page_delay=(1, 2),
+                 url_rules=None, browser_pool_size=1, browser_max_uses=20,
+                 pool_connections=20, pool_maxsize=None, connect_timeout=5, max_retries=3,
+                 backoff_factor=0.5, http2=False, metrics_file=None, progress_fps=4):
         """
         Initialize Nursing PDF downloader with improved search parsing
         """
         self.download_dir = download_dir
         self.delay_range = delay_range
         self.max_file_size_bytes = max_file_size_mb * 1024 * 1024
+        self.max_resume_attempts = max_resume_attempts
+        
+        # Transport: pooled keep-alive connections, separate connect/read timeouts, retries on 429/5xx
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_connections = pool_connections
+        # Enough connections per host for every download and landing-page worker at once
+        self.pool_maxsize = pool_maxsize or max(10, max_workers + landing_page_workers)
         self.session = requests.Session()
+        self.url_classifier = URLClassifier(url_rules)
+        
+        # One politeness policy for every fetch: robots.txt, Crawl-delay and a token bucket per host.
+        # The search engine is paced by delay_range, every other host by per_host_delay.
+        self.politeness = Politeness(per_host_delay=per_host_delay,
+                                     host_delays={host: delay_range for host in SEARCH_HOSTS})
+        
+        # Per-stage counters and latency histograms, written out by close()
+        self.metrics = Metrics('nur_dwn')
+        self.politeness.metrics = self.metrics
+        
+        # Parallel downloads across hosts, serial and spaced out within a host
+        self.scheduler = HostScheduler(max_workers, per_host_limit, self.politeness)
+        
+        # Landing pages are crawled concurrently under a global deadline, each page once per run
+        self.max_landing_pages = max_landing_pages
+        self.landing_page_deadline = landing_page_deadline
+        self.landing_page_delay = landing_page_delay
+        self.page_scheduler = HostScheduler(landing_page_workers, per_host_limit, self.politeness,
+                                            landing_page_delay)
+        self.expanded_pages = URLFrontier()
+        
+        # 'threads' uses requests + the scheduler; 'async' runs all transfers on one event loop
+        self.engine = engine
+        self.async_engine = None
+        if engine == 'async':
+            self.async_engine = AsyncFetchEngine(self, max_connections, per_host_limit,
+                                                 http2=http2 and h2 is not None)
         
         # Create download directory
         os.makedirs(download_dir, exist_ok=True)
         
+        # Downloaded bytes live once in the store; query filenames link to them
+        self.store = PDFStore(os.path.join(download_dir, ".store"))
+        
+        # Validators for landing pages and PDFs so re-runs can get 304s
+        self.http_cache = HTTPCache(os.path.join(download_dir, ".http_cache"),
+                                    max_bytes=cache_max_mb * 1024 * 1024,
+                                    max_entries=cache_max_entries,
+                                    ttl=cache_ttl_days * 24 * 3600)
+        
         # Setup file logging
         log_dir = os.path.join(download_dir, "logs")
         self.logger, self.log_file = setup_file_logging(log_dir)
+        # *.prom for Prometheus text, anything else gets a JSON snapshot
+        self.metrics_file = metrics_file or os.path.splitext(self.log_file)[0] + "_metrics.json"
         
         self.setup_session()
         self.setup_selenium()
+        self.browser_pool = BrowserPool(self.chrome_options, browser_pool_size, browser_max_uses)
         
         # Statistics tracking
         self.stats = {
@@ -76,20 +1579,25 @@ class NursingPDFDownloader:
             'successful_downloads': 0,
             'skipped_too_large': 0,
             'failed_downloads': 0,
+            'skipped_robots': 0,
             'total_size_mb': 0
         }
+        self.stats_lock = threading.Lock()
         
         # Progress tracking
         self.current_query = ""
         self.current_file = ""
         self.query_count = 0
         self.total_queries = 0
+        self.progress = ProgressRenderer(self.format_progress, max_fps=progress_fps)
         
         # Log initialization
         self.logger.info(f"=== Nursing PDF Downloader Initialized ===")
         self.logger.info(f"Download directory: {download_dir}")
         self.logger.info(f"Max file size: {max_file_size_mb} MB")
         self.logger.info(f"Log file: {self.log_file}")
+        if http2 and h2 is None:
+            self.logger.warning("HTTP/2 requested but the h2 package is missing - using HTTP/1.1")
     
     def setup_session(self):
         """Setup requests session with better headers to avoid bot detection"""
@@ -109,6 +1617,24 @@ class NursingPDFDownloader:
             'Sec-Fetch-Site': 'none',
             'Sec-Fetch-User': '?1'
         })
+        
+        # Replace the default adapters (10 connections per host, no retries)
+        retry = JitteredRetry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False  # Callers still see the final status code
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def timeout(self, read):
+        """(connect, read) timeout: fail fast on dead hosts, stay patient with slow bodies"""
+        return (self.connect_timeout, read)
     
     def setup_selenium(self):
         """Setup Selenium with enhanced stealth options"""
@@ -123,126 +1649,161 @@ class NursingPDFDownloader:
         self.chrome_options.add_experimental_option('useAutomationExtension', False)
         self.chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
     
-    def random_delay(self):
-        """Add random delay to avoid detection"""
-        delay = random.uniform(*self.delay_range)
-        time.sleep(delay)
+    def count(self, key, amount=1):
+        """Thread-safe update of a statistics counter"""
+        with self.stats_lock:
+            self.stats[key] += amount
+        self.metrics.inc(key, amount)
     
-    def check_file_size(self, url):
-        """Check file size before downloading"""
-        try:
-            response = self.session.head(url, timeout=10)
-            content_length = response.headers.get('content-length')
-            if content_length:
-                size_bytes = int(content_length)
-                size_mb = size_bytes / (1024 * 1024)
-                self.logger.info(f"File size: {size_mb:.2f} MB")
-                return size_bytes <= self.max_file_size_bytes, size_mb
-            else:
-                return True, 0
-        except Exception as e:
-            self.logger.warning(f"Could not check file size for {url}: {e}")
+    def allowed_by_robots(self, url):
+        """Check url against its host's robots.txt, fetching that once per host"""
+        def fetch(robots_url):
+            try:
+                return self.cached_fetch(robots_url, timeout=10)
+            except Exception:
+                return None, None  # Unreachable robots.txt: no rules
+        
+        self.politeness.ensure_robots(url, fetch)
+        if self.politeness.allowed(url):
+            return True
+        self.logger.warning(f"Disallowed by robots.txt: {url}")
+        return False
+    
+    def size_from_headers(self, headers, status_code=200):
+        """Size gate from GET response headers, before the body is read; returns (size_ok, size_mb)"""
+        # A resumed (206) response carries the full size after the slash in Content-Range
+        content_range = headers.get('content-range', '')
+        total = content_range.rpartition('/')[2] if status_code == 206 else ''
+        content_length = total if total.isdigit() else headers.get('content-length')
+        if content_length and content_length.isdigit():
+            size_bytes = int(content_length)
+            size_mb = size_bytes / (1024 * 1024)
+            self.logger.info(f"File size: {size_mb:.2f} MB")
+            return size_bytes <= self.max_file_size_bytes, size_mb
+        else:
+            # Unknown size: the byte cap in write_chunk still applies
             return True, 0
     
-    def extract_google_pdf_links_fixed(self, soup):
+    def run_async(self, work):
+        """Run work(engine) on the async engine's long-lived loop and client"""
+        return self.async_engine.run(work)
+    
+    def cached_fetch(self, url, timeout=10):
+        """GET through the HTTP cache; returns (status, text), with text only for a 200 or a 304 hit"""
+        entry = self.http_cache.get(url)
+        headers = self.http_cache.validators(entry) if entry else {}
+        
+        response = self.session.get(url, headers=headers, timeout=self.timeout(timeout))
+        if response.status_code == 304 and entry:
+            self.logger.info(f"Not modified, using cached page: {url}")
+            self.http_cache.refresh(url, response.headers)
+            return 200, self.http_cache.read_text(entry)
+        
+        if response.status_code != 200:
+            return response.status_code, None
+        
+        self.http_cache.put(url, response.headers, body=response.content, encoding=response.encoding)
+        return 200, response.text
+    
+    def cached_get(self, url, timeout=10):
+        """GET a page through the HTTP cache; returns the page text or None"""
+        status, text = self.cached_fetch(url, timeout)
+        return text
+    
+    def extract_google_pdf_links_fixed(self, html):
         """FIXED: Better extraction of PDF links from Google search results"""
         pdf_links = []
         potential_pages = []
         
         self.logger.info("Starting Google PDF link extraction...")
+        parse_start = time.perf_counter()
         
-        # Method 1: Look for direct PDF links in various link formats
-        all_links = soup.find_all('a', href=True)
+        # Single pass over the page: every link with the result block it sits in
+        extractor = extract_links(html)
+        all_links = extractor.links
         self.logger.info(f"Found {len(all_links)} total links to process")
         
-        for link in all_links:
-            href = link.get('href', '')
-            
-            # Handle different Google URL formats
-            actual_url = self.extract_actual_url(href)
+        # PDF indicators in search result text
+        pdf_indicators = [
+            'pdf', 'filetype:pdf', '.pdf', 'download pdf',
+            'view pdf', 'full text pdf', 'document pdf'
+        ]
+        results_found = len(extractor.containers)
+        
+        # Handle different Google URL formats, then classify the whole page in one call
+        actual_urls = [self.extract_actual_url(href) for href, _, _ in all_links]
+        kinds = self.url_classifier.classify_batch(actual_urls)
+        
+        for (_, _, container), actual_url, kind in zip(all_links, actual_urls, kinds):
             if not actual_url:
                 continue
-                
+            
             # Check for direct PDF links
-            if self.is_pdf_link(actual_url):
+            if kind == 'pdf':
                 pdf_links.append(actual_url)
-                self.logger.info(f"Found direct PDF: {actual_url}")
+                if container is not None and any(indicator in container.text for indicator in pdf_indicators):
+                    self.logger.info(f"Found PDF from result text: {actual_url}")
+                else:
+                    self.logger.info(f"Found direct PDF: {actual_url}")
             
             # Collect potential pages that might contain PDFs
-            elif self.is_potential_pdf_page(actual_url):
+            elif kind == 'page':
                 potential_pages.append(actual_url)
         
-        # Method 2: Look for PDF indicators in search result text
-        self.logger.info(f"Checking search results for PDF indicators...")
-        
-        # Updated selectors for current Google layout
-        result_selectors = [
-            'div.g',           # Classic Google result container
-            'div.tF2Cxc',      # Alternative result container
-            'div.MjjYud',      # Newer result container
-            'div[data-sokoban-container]',  # Another variant
-            'div[data-ved]'    # Results with data-ved attribute
-        ]
-        
-        results_found = 0
-        for selector in result_selectors:
-            results = soup.select(selector)
-            if results:
-                results_found += len(results)
-                self.logger.info(f"Found {len(results)} results with selector: {selector}")
-                
-                for result in results:
-                    # Look for PDF mentions in result text
-                    text_content = result.get_text().lower()
-                    
-                    # Check for PDF indicators
-                    pdf_indicators = [
-                        'pdf', 'filetype:pdf', '.pdf', 'download pdf',
-                        'view pdf', 'full text pdf', 'document pdf'
-                    ]
-                    
-                    if any(indicator in text_content for indicator in pdf_indicators):
-                        # Find the main link for this result
-                        main_links = result.find_all('a', href=True)
-                        
-                        for main_link in main_links:
-                            href = main_link.get('href', '')
-                            actual_url = self.extract_actual_url(href)
-                            
-                            if actual_url:
-                                if self.is_pdf_link(actual_url):
-                                    pdf_links.append(actual_url)
-                                    self.logger.info(f"Found PDF from result text: {actual_url}")
-                                elif self.is_potential_pdf_page(actual_url):
-                                    potential_pages.append(actual_url)
-        
         self.logger.info(f"Total search results processed: {results_found}")
+        self.metrics.observe('parse_seconds', time.perf_counter() - parse_start, page='search')
         
-        # Method 3: Check potential pages for PDFs (limit to avoid too many requests)
-        unique_potential = list(set(potential_pages))
+        # Check potential pages for PDFs (limit to avoid too many requests)
+        unique_potential = URLFrontier().filter_new(potential_pages)
         self.logger.info(f"Found {len(unique_potential)} potential PDF pages to check")
-        
-        for i, page_url in enumerate(unique_potential[:8]):  # Limit to 8 pages
-            try:
-                self.update_progress(f"Checking page {i+1}/8 for PDFs...")
-                page_pdfs = self.extract_pdfs_from_page(page_url)
-                pdf_links.extend(page_pdfs)
-                if page_pdfs:
-                    self.logger.info(f"Found {len(page_pdfs)} PDFs on page: {page_url}")
-                
-                # Delay between page checks
-                time.sleep(random.uniform(1, 2))
-                
-            except Exception as e:
-                self.logger.warning(f"Failed to check page {page_url}: {e}")
-                continue
+        pdf_links.extend(self.expand_landing_pages(unique_potential))
         
         # Remove duplicates and return
-        unique_pdf_links = list(set(pdf_links))
+        unique_pdf_links = URLFrontier().filter_new(pdf_links)
         self.logger.info(f"Final PDF links found: {len(unique_pdf_links)}")
         
         return unique_pdf_links
     
+    def expand_landing_pages(self, page_urls):
+        """Fetch landing pages concurrently and return the PDF links found on them"""
+        # Pages already expanded in this run (e.g. by an earlier query variation) are skipped
+        new_pages = []
+        for url in page_urls:
+            if len(new_pages) >= self.max_landing_pages:
+                break
+            if self.expanded_pages.add(url):
+                new_pages.append(url)
+        if not new_pages:
+            return []
+        
+        with self.metrics.timer('landing_expand_seconds'):
+            found = self.fetch_landing_pages(new_pages)
+        
+        pdf_links = []
+        for page_url, page_pdfs in found.items():
+            if page_pdfs:
+                self.logger.info(f"Found {len(page_pdfs)} PDFs on page: {page_url}")
+            pdf_links.extend(page_pdfs)
+        return pdf_links
+    
+    def fetch_landing_pages(self, new_pages):
+        """{page_url: pdf_links} for every page checked before the landing-page deadline"""
+        deadline = time.monotonic() + self.landing_page_deadline
+        if self.engine == 'async':
+            found = self.run_async(lambda engine: engine.expand_pages(new_pages, deadline))
+        else:
+            found = {}
+            jobs = [(url, url, self.extract_pdfs_from_page, (url,)) for url in new_pages]
+            for done, (page_url, future) in enumerate(self.page_scheduler.run(jobs, deadline), 1):
+                self.update_progress(f"Checked {done}/{len(new_pages)} pages for PDFs...")
+                try:
+                    found[page_url] = future.result()
+                except Exception as e:
+                    self.logger.warning(f"Failed to check page {page_url}: {e}")
+            if len(found) < len(new_pages):
+                self.logger.warning(f"Landing page deadline reached, checked {len(found)}/{len(new_pages)} pages")
+        return found
+    
     def extract_actual_url(self, href):
         """Extract actual URL from Google's various link formats"""
         if not href:
@@ -275,52 +1836,11 @@ class NursingPDFDownloader:
     
     def is_pdf_link(self, url):
         """Check if URL is likely a direct PDF link"""
-        if not url:
-            return False
-            
-        url_lower = url.lower()
-        
-        # Direct PDF file extensions
-        if url_lower.endswith('.pdf'):
-            return True
-        
-        # PDF in URL path or parameters
-        if '.pdf' in url_lower:
-            return True
-        
-        # Common PDF download patterns
-        pdf_patterns = [
-            '/pdf/', '/pdfs/', '/documents/', '/download/',
-            'format=pdf', 'type=pdf', 'filetype=pdf'
-        ]
-        
-        return any(pattern in url_lower for pattern in pdf_patterns)
+        return self.url_classifier.is_pdf(url)
     
     def is_potential_pdf_page(self, url):
         """Check if URL might contain PDFs"""
-        if not url:
-            return False
-            
-        url_lower = url.lower()
-        
-        # Skip obviously non-PDF sites
-        skip_domains = [
-            'google.com', 'youtube.com', 'facebook.com', 'twitter.com',
-            'instagram.com', 'linkedin.com', 'amazon.com', 'ebay.com'
-        ]
-        
-        if any(domain in url_lower for domain in skip_domains):
-            return False
-        
-        # Look for promising indicators
-        good_indicators = [
-            'repository', 'library', 'docs', 'publications', 'resources',
-            'nursing', 'medical', 'health', 'education', '.edu', '.ac.',
-            'university', 'college', 'research', 'journal', 'ncbi',
-            'pubmed', 'who.int', 'cdc.gov', 'nih.gov'
-        ]
-        
-        return any(indicator in url_lower for indicator in good_indicators)
+        return self.url_classifier.is_potential_page(url)
     
     def search_google_direct_pdfs_fixed(self, query, max_results=15):
         """FIXED: Search Google directly for PDF files with better parsing"""
@@ -337,6 +1857,8 @@ class NursingPDFDownloader:
             f"{query} handbook filetype:pdf site:edu"
         ]
         
+        # One frontier for all variations: known URLs are dropped before any network call
+        frontier = URLFrontier()
         all_links = []
         
         for i, search_query in enumerate(search_variations, 1):
@@ -345,20 +1867,18 @@ class NursingPDFDownloader:
                 
                 # Search multiple pages for this variation
                 variation_links = self.search_google_pages_fixed(search_query, pages=2)
-                all_links.extend(variation_links)
-                self.logger.info(f"Google variation {i} found {len(variation_links)} PDF links")
+                new_links = frontier.filter_new(variation_links)
+                all_links.extend(new_links)
+                self.logger.info(f"Google variation {i} found {len(variation_links)} PDF links ({len(new_links)} new)")
                 
                 if len(all_links) >= max_results:
                     break
                 
-                # Respectful delay between search variations
-                time.sleep(random.uniform(3, 5))
-                
             except Exception as e:
                 self.logger.error(f"Google PDF search variation {i} failed: {e}")
                 continue
         
-        unique_links = list(set(all_links))[:max_results]
+        unique_links = all_links[:max_results]
         self.logger.info(f"Google direct PDF search found {len(unique_links)} unique links")
         
         # Log some example links for debugging
@@ -378,10 +1898,11 @@ class NursingPDFDownloader:
                 search_url = f"https://www.google.com/search?q={urllib.parse.quote(search_query)}&start={start}"
                 self.logger.info(f"Google search page {page + 1}: {search_url}")
                 
-                # Add random delay before request
-                time.sleep(random.uniform(1, 3))
+                # Search requests are paced per host like every other fetch (robots.txt does not apply)
+                self.politeness.wait(search_url)
                 
-                response = self.session.get(search_url, timeout=15)
+                with self.metrics.timer('search_fetch_seconds'):
+                    response = self.session.get(search_url, timeout=self.timeout(15))
                 
                 if response.status_code == 200:
                     # Save raw HTML for debugging
@@ -394,8 +1915,7 @@ class NursingPDFDownloader:
                         except:
                             pass
                     
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    page_links = self.extract_google_pdf_links_fixed(soup)
+                    page_links = self.extract_google_pdf_links_fixed(response.text)
                     all_links.extend(page_links)
                     self.logger.info(f"Google page {page + 1} found {len(page_links)} PDF links")
                     
@@ -415,10 +1935,6 @@ class NursingPDFDownloader:
                     
                     break
                 
-                # Delay between pages
-                if page < pages - 1:
-                    time.sleep(random.uniform(2, 4))
-                
             except Exception as e:
                 self.logger.error(f"Google search page {page + 1} failed: {e}")
                 
@@ -440,28 +1956,23 @@ class NursingPDFDownloader:
         self.logger.info("Using Selenium for search")
         
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
-            
-            # Execute script to hide webdriver property
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            driver.get(search_url)
-            
-            # Wait for page to load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Additional wait for dynamic content
-            time.sleep(3)
+            with self.metrics.timer('browser_search_seconds'), self.browser_pool.lease() as driver:
+                driver.get(search_url)
+                
+                # Wait until the document is loaded and results (or a consent/captcha form) exist
+                try:
+                    WebDriverWait(driver, 10, poll_frequency=0.2).until(
+                        lambda d: d.execute_script(SEARCH_READY_SCRIPT)
+                    )
+                except TimeoutException:
+                    self.logger.warning("Search results not detected, using page as loaded")
+                
+                page_source = driver.page_source
             
-            # Get page source and parse
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            pdf_links = self.extract_google_pdf_links_fixed(soup)
+            # Parse after handing the browser back so landing-page checks don't hold it
+            pdf_links = self.extract_google_pdf_links_fixed(page_source)
             
             self.logger.info(f"Selenium found {len(pdf_links)} PDF links")
-            
-            driver.quit()
             return pdf_links
             
         except Exception as e:
@@ -470,121 +1981,267 @@ class NursingPDFDownloader:
     
     def extract_pdfs_from_page(self, page_url):
         """Extract PDF links from a specific page"""
-        pdf_links = []
+        if self.engine == 'async':
+            return self.run_async(lambda engine: engine.extract_pdfs_from_page(page_url))
         
         try:
-            response = self.session.get(page_url, timeout=10)
-            if response.status_code != 200:
-                return pdf_links
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Look for direct PDF links
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                
-                # Convert relative URLs to absolute
-                if href.startswith('/'):
-                    href = urljoin(page_url, href)
-                elif not href.startswith('http'):
-                    continue
-                
-                # Check if it's a PDF
-                if self.is_pdf_link(href):
-                    pdf_links.append(href)
-            
-            # Look for download buttons or PDF indicators
-            for element in soup.find_all(['a', 'button'], href=True):
-                text = element.get_text().lower()
-                href = element.get('href', '')
-                
-                if any(word in text for word in ['download', 'pdf', 'view pdf', 'full text']):
-                    if href.startswith('/'):
-                        href = urljoin(page_url, href)
-                    
-                    if href.startswith('http') and self.is_pdf_link(href):
-                        pdf_links.append(href)
-            
-            # Look for meta tags
-            for meta in soup.find_all('meta'):
-                content = meta.get('content', '')
-                if self.is_pdf_link(content):
-                    if content.startswith('http'):
-                        pdf_links.append(content)
-                    elif content.startswith('/'):
-                        pdf_links.append(urljoin(page_url, content))
-                        
+            if not self.allowed_by_robots(page_url):
+                return []
+            self.politeness.wait(page_url, self.landing_page_delay)
+            with self.metrics.timer('page_fetch_seconds'):
+                page_text = self.cached_get(page_url, timeout=10)
+            if page_text is None:
+                return []
+            with self.metrics.timer('parse_seconds', page='landing'):
+                return self.extract_pdfs_from_html(page_text, page_url)
+        
         except Exception as e:
             self.logger.error(f"Error extracting PDFs from {page_url}: {e}")
+            return []
+    
+    def extract_pdfs_from_html(self, html, page_url):
+        """Extract PDF links from an already fetched page"""
+        pdf_links = []
+        extractor = extract_links(html, link_tags=('a', 'button'))
+        
+        # Look for direct PDF links and download buttons
+        for href, _, _ in extractor.links:
+            # Convert relative URLs to absolute
+            if href.startswith('/'):
+                href = urljoin(page_url, href)
+            elif not href.startswith('http'):
+                continue
+            
+            # Check if it's a PDF
+            if self.is_pdf_link(href):
+                pdf_links.append(href)
+        
+        # Look for meta tags
+        for content in extractor.meta_contents:
+            if self.is_pdf_link(content):
+                if content.startswith('http'):
+                    pdf_links.append(content)
+                elif content.startswith('/'):
+                    pdf_links.append(urljoin(page_url, content))
         
         return list(set(pdf_links))
     
     def download_pdf(self, url, filename=None):
         """Download a single PDF file with size checking"""
-        self.stats['total_attempted'] += 1
+        if self.engine == 'async':
+            return self.run_async(lambda engine: engine.download_pdf(url, filename))
+        
+        self.count('total_attempted')
         self.logger.info(f"Attempting to download: {url}")
         
         try:
-            # Check file size first
-            size_ok, size_mb = self.check_file_size(url)
-            if not size_ok:
-                self.logger.warning(f"File too large ({size_mb:.2f} MB > {self.max_file_size_bytes/(1024*1024)} MB): {url}")
-                self.stats['skipped_too_large'] += 1
-                return False
-            
-            # Generate filename if not provided
-            if not filename:
-                parsed_url = urlparse(url)
-                filename = os.path.basename(parsed_url.path)
-                if not filename.endswith('.pdf'):
-                    filename += '.pdf'
+            filename, filepath = self.target_path(url, filename)
             
-            filepath = os.path.join(self.download_dir, filename)
-            self.logger.info(f"Saving as: {filename}")
-            
-            # Check if file already exists
-            if os.path.exists(filepath):
-                self.logger.info(f"File already exists: {filename}")
-                self.stats['successful_downloads'] += 1  # Count as success
+            # Known URL with validators: revalidate instead of downloading again
+            entry = self.revalidation_entry(url)
+            if self.link_existing(url, filename, filepath, entry):
                 return True
             
-            response = self.session.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            # Check content type
-            content_type = response.headers.get('content-type', '').lower()
-            if 'pdf' not in content_type and not url.lower().endswith('.pdf'):
-                self.logger.warning(f"Not a PDF file (content-type: {content_type}): {url}")
-                self.stats['failed_downloads'] += 1
+            if not self.allowed_by_robots(url):
+                self.count('skipped_robots')
                 return False
+            self.politeness.wait(url)
+            started = time.perf_counter()
             
-            # Download with size checking
-            downloaded_size = 0
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    downloaded_size += len(chunk)
-                    
-                    # Check if file is getting too large
-                    if downloaded_size > self.max_file_size_bytes:
-                        self.logger.warning(f"File exceeded size limit during download: {url}")
-                        f.close()
-                        os.remove(filepath)  # Remove partial file
-                        self.stats['skipped_too_large'] += 1
-                        return False
+            # Download into a .part file, resuming with Range requests where the server allows
+            writer = self.store.open_writer(url)
+            try:
+                for attempt in range(self.max_resume_attempts + 1):
+                    with self.metrics.timer('download_headers_seconds'):
+                        response = self.session.get(url, headers=self.request_headers(url, writer, entry),
+                                                    stream=True, timeout=self.timeout(30))
                     
-                    f.write(chunk)
-            
-            file_size_mb = downloaded_size / (1024 * 1024)
-            self.stats['total_size_mb'] += file_size_mb
-            self.stats['successful_downloads'] += 1
+                    # Closing the response on every path hands the connection back (or drops an unread body)
+                    with response:
+                        if response.status_code == 304 and entry:
+                            writer.abort()
+                            return self.link_not_modified(url, filename, filepath, entry, response.headers)
+                        
+                        if response.status_code == 416:
+                            # Stale .part file no longer matches the remote file
+                            writer.restart()
+                            writer.meta = {}
+                            continue
+                        
+                        response.raise_for_status()
+                        
+                        if not self.is_pdf_response(url, response.headers):
+                            writer.abort()
+                            return False
+                        
+                        # Check file size from the GET headers and hang up before the body if too large
+                        size_ok, size_mb = self.size_from_headers(response.headers, response.status_code)
+                        if not size_ok:
+                            writer.abort()
+                            self.log_too_large(url, size_mb)
+                            return False
+                        
+                        writer.start(response)
+                        
+                        # Download with size checking, hashing as we go
+                        try:
+                            for chunk in response.iter_content(chunk_size=8192):
+                                if not self.write_chunk(url, writer, chunk):
+                                    return False
+                        except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError) as e:
+                            if writer.can_resume and attempt < self.max_resume_attempts:
+                                self.logger.warning(f"Transfer interrupted at {writer.size} bytes ({e}): {url}")
+                                continue
+                            raise
+                        break
+                else:
+                    raise IOError(f"Gave up after {self.max_resume_attempts} resume attempts")
+                
+                # Files shorter than the header window are only decided here
+                if not writer.looks_like_pdf():
+                    self.reject_not_pdf(url, writer)
+                    return False
+                digest = writer.commit()
+            except Exception:
+                self.keep_or_drop_partial(writer)
+                raise
             
-            self.logger.info(f"Successfully downloaded: {filename} ({file_size_mb:.2f} MB)")
-            return True
+            return self.finish_download(url, filename, filepath, digest, writer.size, response.headers,
+                                        elapsed=time.perf_counter() - started)
             
         except Exception as e:
             self.logger.error(f"Failed to download {url}: {e}")
-            self.stats['failed_downloads'] += 1
+            self.count('failed_downloads')
+            return False
+    
+    def target_path(self, url, filename=None):
+        """Generate filename if not provided; returns (filename, filepath)"""
+        if not filename:
+            parsed_url = urlparse(url)
+            filename = os.path.basename(parsed_url.path)
+            if not filename.endswith('.pdf'):
+                filename += '.pdf'
+        
+        filepath = os.path.join(self.download_dir, filename)
+        self.logger.info(f"Saving as: {filename}")
+        return filename, filepath
+    
+    def revalidation_entry(self, url):
+        """HTTP cache entry for a PDF URL whose stored blob still exists"""
+        entry = self.http_cache.get(url)
+        if entry and entry.get('digest') and os.path.exists(self.store.blob_path(entry['digest'])):
+            return entry
+        return None
+    
+    def link_existing(self, url, filename, filepath, entry):
+        """Satisfy a download without any network traffic where possible"""
+        # Check if file already exists
+        if os.path.exists(filepath):
+            if is_complete_pdf(filepath):
+                self.logger.info(f"File already exists: {filename}")
+                self.count('successful_downloads')  # Count as success
+                return True
+            # Truncated or non-PDF leftover from an older run
+            self.logger.warning(f"Replacing broken existing file: {filename}")
+            os.remove(filepath)
+        
+        if entry:
             return False
+        
+        # Same URL already fetched under another name - just link it
+        digest = self.store.lookup_url(url)
+        if digest:
+            self.store.link(digest, filepath)
+            self.logger.info(f"Already stored as {digest[:12]}, linked: {filename}")
+            self.count('successful_downloads')
+            return True
+        return False
+    
+    def request_headers(self, url, writer, entry):
+        """Range headers when resuming, otherwise cache validators"""
+        if writer.can_resume:
+            self.logger.info(f"Resuming at {writer.size} bytes: {url}")
+            return writer.resume_headers()
+        return self.http_cache.validators(entry) if entry else {}
+    
+    def link_not_modified(self, url, filename, filepath, entry, headers):
+        """304 Not Modified: link the stored copy"""
+        self.http_cache.refresh(url, headers)
+        self.store.link(entry['digest'], filepath)
+        self.logger.info(f"Not modified, linked stored copy {entry['digest'][:12]}: {filename}")
+        self.count('successful_downloads')
+        return True
+    
+    def is_pdf_response(self, url, headers):
+        """Check content type"""
+        content_type = headers.get('content-type', '').lower()
+        if 'pdf' not in content_type and not url.lower().endswith('.pdf'):
+            self.logger.warning(f"Not a PDF file (content-type: {content_type}): {url}")
+            self.count('failed_downloads')
+            return False
+        return True
+    
+    def log_too_large(self, url, size_mb):
+        self.logger.warning(f"File too large ({size_mb:.2f} MB > {self.max_file_size_bytes/(1024*1024)} MB): {url}")
+        self.count('skipped_too_large')
+    
+    def write_chunk(self, url, writer, chunk):
+        """Write one chunk; returns False once the file is over the size limit"""
+        # Check if file is getting too large
+        if writer.size + len(chunk) > self.max_file_size_bytes:
+            self.logger.warning(f"File exceeded size limit during download: {url}")
+            writer.abort()  # Remove partial file
+            self.count('skipped_too_large')
+            return False
+        
+        writer.write(chunk)
+        
+        # Abort as soon as the first bytes show this is not a PDF (e.g. an HTML error page)
+        if writer.looks_like_pdf() is False:
+            self.reject_not_pdf(url, writer)
+            return False
+        return True
+    
+    def reject_not_pdf(self, url, writer):
+        self.logger.warning(f"Not a PDF file (no {PDF_MAGIC.decode()} header): {url}")
+        writer.abort()
+        self.count('failed_downloads')
+    
+    def keep_or_drop_partial(self, writer):
+        """Keep resumable progress for the next run, drop anything we could not resume"""
+        if writer.can_resume:
+            writer.suspend()
+        else:
+            writer.abort()
+    
+    def finish_download(self, url, filename, filepath, digest, size, headers, elapsed=None):
+        """Link a committed blob under its filename and record stats"""
+        if elapsed:
+            self.metrics.observe('download_seconds', elapsed)
+            self.metrics.observe('download_bytes_per_second', size / elapsed, buckets=THROUGHPUT_BUCKETS)
+        self.metrics.inc('download_bytes', size)
+        self.http_cache.put(url, headers, digest=digest)
+        self.store.link(digest, filepath)
+        
+        # Parse the finished file once and keep the result next to the blob
+        if not self.store.has_metadata(digest):
+            try:
+                metadata = read_pdf_metadata(self.store.blob_path(digest))
+                self.store.set_metadata(digest, metadata)
+                self.logger.info(f"PDF info: {metadata['pages']} pages, encrypted={metadata['encrypted']}, "
+                                 f"title={metadata['title']!r}")
+            except Exception as e:
+                self.logger.warning(f"Could not read PDF metadata for {filename}: {e}")
+
+        if self.store.is_duplicate(digest):
+            self.logger.info(f"Content already stored as {digest[:12]}, linked: {filename}")
+        
+        file_size_mb = size / (1024 * 1024)
+        self.count('total_size_mb', file_size_mb)
+        self.count('successful_downloads')
+        
+        self.logger.info(f"Successfully downloaded: {filename} ({file_size_mb:.2f} MB)")
+        return True
     
     def download_pdfs_from_search(self, query, max_downloads=10):
         """Search and download PDFs for a specific query using fixed methods"""
@@ -594,7 +2251,7 @@ class NursingPDFDownloader:
         all_links = self.search_google_direct_pdfs_fixed(query, max_downloads)
         
         # Remove duplicates and limit results
-        unique_links = list(set(all_links))[:max_downloads]
+        unique_links = URLFrontier().filter_new(all_links)[:max_downloads]
         self.logger.info(f"Total unique links for '{query}': {len(unique_links)}")
         
         if not unique_links:
@@ -602,30 +2259,63 @@ class NursingPDFDownloader:
             self.logger.warning(f"No PDF links found for query: {query}")
             return 0
         
-        # Download each PDF
-        successful_downloads = 0
+        # Download PDFs in parallel across hosts; requests to one host are spaced out
+        jobs = []
         for i, link in enumerate(unique_links, 1):
-            # Update current file being processed
-            self.current_file = os.path.basename(urlparse(link).path)
-            self.update_progress(f"Downloading {i}/{len(unique_links)}")
-            
             # Generate descriptive filename
             filename = self.generate_filename(query, link, i)
-            
-            if self.download_pdf(link, filename):
-                successful_downloads += 1
-                self.update_progress(f"Downloaded {i}/{len(unique_links)}")
-            else:
-                self.update_progress(f"Failed {i}/{len(unique_links)}")
-            
-            # Add delay between downloads
-            if i < len(unique_links):
-                time.sleep(random.uniform(1, 3))
+            jobs.append((link, filename))
+        
+        self.update_progress(f"Downloading {len(unique_links)} files")
+        
+        if self.engine == 'async':
+            successful_downloads = self.run_async(lambda engine: self.download_all_async(engine, jobs))
+        else:
+            successful_downloads = self.download_all_threaded(jobs)
         
         self.current_file = ""
+        self.store.flush()
+        self.http_cache.flush()
         self.logger.info(f"Query '{query}' completed: {successful_downloads}/{len(unique_links)} downloads successful")
         return successful_downloads
     
+    def download_all_threaded(self, jobs):
+        """Download (link, filename) jobs through the per-host thread scheduler"""
+        scheduled = [(link, link, self.download_pdf, (link, filename)) for link, filename in jobs]
+        
+        successful_downloads = 0
+        for done, (link, future) in enumerate(self.scheduler.run(scheduled), 1):
+            try:
+                success = future.result()
+            except Exception as e:
+                self.logger.error(f"Download worker failed for {link}: {e}")
+                success = False
+            successful_downloads += self.report_download(link, success, done, len(jobs))
+        return successful_downloads
+    
+    async def download_all_async(self, engine, jobs):
+        """Download (link, filename) jobs as concurrent coroutines"""
+        async def download_one(link, filename):
+            return link, await engine.download_pdf(link, filename)
+        
+        successful_downloads = 0
+        pending = [download_one(link, filename) for link, filename in jobs]
+        for done, next_result in enumerate(asyncio.as_completed(pending), 1):
+            link, success = await next_result
+            successful_downloads += self.report_download(link, success, done, len(jobs))
+        return successful_downloads
+    
+    def report_download(self, link, success, done, total):
+        """Progress update for one finished download; returns 1 on success"""
+        # Update current file being processed
+        self.current_file = os.path.basename(urlparse(link).path)
+        
+        if success:
+            self.update_progress(f"Downloaded {done}/{total}")
+            return 1
+        self.update_progress(f"Failed {done}/{total}")
+        return 0
+    
     def generate_filename(self, query, url, index):
         """Generate descriptive filename for PDF"""
         # Clean query for filename
@@ -650,11 +2340,11 @@ class NursingPDFDownloader:
         return filename
     
     def update_progress(self, status=""):
-        """Update progress display in place"""
-        # Clear the line and move cursor to beginning
-        sys.stdout.write('\r' + ' ' * 120 + '\r')
-        
-        # Create progress line
+        """Update progress display in place (drawn by the background renderer)"""
+        self.progress.update(status)
+    
+    def format_progress(self, status=""):
+        """Progress line for the current query, stats and file"""
         progress_line = f"Query {self.query_count}/{self.total_queries}: '{self.current_query}' | "
         progress_line += f"Downloads: {self.stats['successful_downloads']} | "
         progress_line += f"Failed: {self.stats['failed_downloads']} | "
@@ -665,21 +2355,32 @@ class NursingPDFDownloader:
         
         if self.current_file:
             progress_line += f" | Current: {self.current_file[:30]}..."
-        
-        # Truncate if too long
-        if len(progress_line) > 120:
-            progress_line = progress_line[:117] + "..."
-        
-        sys.stdout.write(progress_line)
-        sys.stdout.flush()
+        return progress_line
+    
+    def close(self):
+        """Release browsers and other long-lived resources, then write the run's metrics"""
+        self.progress.close()
+        self.browser_pool.close()
+        if self.async_engine is not None:
+            self.async_engine.close()
+        self.store.flush()
+        self.http_cache.flush()
+        try:
+            self.metrics.write(self.metrics_file)
+            self.logger.info(f"Metrics written to: {self.metrics_file}")
+        except OSError as e:
+            self.logger.warning(f"Could not write metrics: {e}")
     
     def print_stats(self):
         """Print final download statistics"""
+        # Stop redrawing the progress line so it cannot interleave with the report
+        self.progress.close()
         print(f"\n\n=== FINAL DOWNLOAD STATISTICS ===")
         print(f"Total files attempted: {self.stats['total_attempted']}")
         print(f"Successful downloads: {self.stats['successful_downloads']}")
         print(f"Skipped (too large): {self.stats['skipped_too_large']}")
         print(f"Failed downloads: {self.stats['failed_downloads']}")
+        print(f"Skipped (robots.txt): {self.stats['skipped_robots']}")
         print(f"Total size downloaded: {self.stats['total_size_mb']:.2f} MB")
         if self.stats['successful_downloads'] > 0:
             avg_size = self.stats['total_size_mb'] / self.stats['successful_downloads']
@@ -714,6 +2415,9 @@ def main():
     except Exception as e:
         print(f"\nTest failed with error: {e}")
         downloader.logger.error(f"Test failed: {e}")
+    
+    finally:
+        downloader.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Run metrics shared by nur_dwn.py and uploaderv3.py
+Counters and histograms per stage, exported as Prometheus text or a JSON snapshot
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Seconds: from a parsed page (~ms) up to a slow upload (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Bytes per second: dial-up-slow origins up to fast CDNs
+THROUGHPUT_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((bound, total))
+        pairs.append((float('inf'), self.count))
+        return pairs
+
+class Metrics:
+    """Thread-safe counters and histograms keyed by name and labels"""
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of a block in seconds, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """Plain-dict view of every metric, suitable for JSON"""
+        with self.lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.sum,
+                           'buckets': {str(bound): count for bound, count in h.cumulative()}}
+                          for (name, labels), h in sorted(self.histograms.items())]
+        return {
+            'namespace': self.namespace,
+            'started': self.started,
+            'duration_seconds': time.time() - self.started,
+            'counters': counters,
+            'histograms': histograms
+        }
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        typed = set()
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                # Prometheus counters carry a _total suffix
+                full = f"{self.namespace}_{name}" + ("" if name.endswith("_total") else "_total")
+                if full not in typed:
+                    lines.append(f"# TYPE {full} counter")
+                    typed.add(full)
+                lines.append(f"{full}{label_text(labels)} {value}")
+
+            for (name, labels), h in sorted(self.histograms.items()):
+                full = f"{self.namespace}_{name}"
+                if full not in typed:
+                    lines.append(f"# TYPE {full} histogram")
+                    typed.add(full)
+                for bound, count in h.cumulative():
+                    le = "+Inf" if bound == float('inf') else repr(float(bound))
+                    lines.append(f"{full}_bucket{label_text(labels, [('le', le)])} {count}")
+                lines.append(f"{full}_sum{label_text(labels)} {h.sum}")
+                lines.append(f"{full}_count{label_text(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write Prometheus text for *.prom files, otherwise a JSON snapshot"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if str(path).endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+        return path
@@ -5,17 +5,310 @@ Streamlined version focusing on session persistence and reliable uploads
 """
 
 import os
+import re
 import sys
 import time
 import json
+import zlib
+import stat
+import base64
+import fnmatch
+import itertools
+import queue
+import hashlib
 import getpass
+import tempfile
+import threading
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from run_metrics import Metrics
+
+# Optional: encrypted session persistence (pip install cryptography)
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+except ImportError:
+    Fernet = None
+
+# Reads the upload outcome in one WebDriver round-trip: [state, detail]
+UPLOAD_STATE_SCRIPT = """
+    var visible = function (el) {
+        return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    };
+    var url = window.location.href;
+    if (url.indexOf('/study-notes/') !== -1 && url.indexOf('/create') === -1) {
+        return ['redirect', url];
+    }
+    if (Array.prototype.some.call(document.querySelectorAll('.alert-success'), visible)) {
+        return ['success', url];
+    }
+    var errors = Array.prototype.filter.call(
+        document.querySelectorAll('.alert-danger, .invalid-feedback'),
+        function (el) { return visible(el) && el.innerText.trim(); });
+    if (errors.length) {
+        return ['error', errors[0].innerText.trim()];
+    }
+    return ['pending', url];
+"""
+
+# Fills every non-file field in one WebDriver round-trip: [subject, subject_fallback, price]
+FORM_FILL_SCRIPT = """
+    var data = arguments[0];
+    var form = document.querySelector("[name='title']").form || document;
+    var field = function (name) { return form.querySelector("[name='" + name + "']"); };
+    var setValue = function (el, value) {
+        el.value = value;
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+    };
+
+    setValue(field('title'), data.title);
+    setValue(field('description'), data.description);
+
+    // Subject by visible text, falling back to the first real option
+    var select = field('subject_id');
+    var subject = null;
+    var fallback = false;
+    var options = Array.prototype.slice.call(select.options);
+    var match = options.filter(function (o) { return o.text.trim() === data.subject; })[0];
+    if (!match) {
+        var named = options.filter(function (o) { return o.text.trim(); });
+        match = named.length > 1 ? named[1] : null;
+        fallback = true;
+    }
+    if (match) {
+        setValue(select, match.value);
+        subject = match.text.trim();
+    }
+
+    // Pricing: click the checkbox so any page handlers toggling the price field still run
+    var isFree = field('is_free');
+    var priceField = field('price');
+    var price = data.price;
+    if (price > 0 && !priceField) {
+        price = null;  // No price input on the page, publish as free
+    }
+    var wantFree = !price;
+    if (isFree.checked !== wantFree) {
+        isFree.click();
+    }
+    if (!wantFree) {
+        setValue(priceField, String(price));
+    }
+    return [subject, fallback, price];
+"""
+
+# Full session check in one WebDriver round-trip: not on /login and a visible logged-in element
+SESSION_STATE_SCRIPT = """
+    if (window.location.href.indexOf('/login') !== -1) {
+        return false;
+    }
+    var selectors = arguments[0];
+    for (var i = 0; i < selectors.length; i++) {
+        var found = document.querySelectorAll(selectors[i]);
+        for (var j = 0; j < found.length; j++) {
+            var el = found[j];
+            if (el.offsetWidth || el.offsetHeight || el.getClientRects().length) {
+                return true;
+            }
+        }
+    }
+    return false;
+"""
+
+AUTH_INDICATORS = [".navbar-nav", "a[href*='logout']", ".user-menu", "[data-user]"]
+
+# Between full checks, a session is trusted while upload_file sees no /login redirect
+SESSION_CHECK_INTERVAL = 300
+
+# Saved cookies + localStorage, encrypted with a key derived from the account password
+SESSION_FILE = Path("academerit_session.bin")
+SESSION_SALT_BYTES = 16
+SESSION_FILE_LOCK = threading.Lock()
+
+# Append-only per-file upload states, replayed on startup
+UPLOAD_JOURNAL_FILE = Path("upload_journal.jsonl")
+
+class UploadJournal:
+    """Crash-safe JSONL journal of upload states keyed by file content hash"""
+    
+    STATES = ('queued', 'submitted', 'confirmed', 'failed')
+    
+    def __init__(self, path=UPLOAD_JOURNAL_FILE):
+        self.path = Path(path)
+        self.entries = {}       # digest -> latest record
+        self.stat_index = {}    # (name, size, mtime_ns) -> digest, avoids rehashing unchanged files
+        self.lock = threading.Lock()
+        self.load()
+    
+    def load(self):
+        """Replay the journal; the last record for a digest wins"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash mid-write
+                self.entries[record['hash']] = record
+                self.stat_index[(record['name'], record['size'], record['mtime_ns'])] = record['hash']
+    
+    def file_hash(self, file_path):
+        """SHA-256 of the file contents, reusing the journal's digest for unchanged files"""
+        stat = file_path.stat()
+        key = (file_path.name, stat.st_size, stat.st_mtime_ns)
+        digest = self.stat_index.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self.lock:
+                self.stat_index[key] = digest
+        return digest, key
+    
+    def state(self, file_path):
+        digest, _ = self.file_hash(file_path)
+        record = self.entries.get(digest)
+        return record['state'] if record else None
+    
+    def mark(self, file_path, state, detail=None):
+        """Append one state change and fsync it before returning"""
+        digest, (name, size, mtime_ns) = self.file_hash(file_path)
+        record = {
+            'hash': digest,
+            'name': name,
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'state': state,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if detail:
+            record['detail'] = detail
+        
+        line = json.dumps(record) + "\n"
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[digest] = record
+
+# Start of a word inside camelCase ("NursingFundamentals", "ATIFundamentals")
+CAMEL_BOUNDARY = re.compile(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+
+# Keywords up to this length (ati, hesi, quiz, test...) must start a word
+SHORT_KEYWORD = 4
+
+def split_words(title):
+    """Lowercased title with camelCase humps turned into word breaks"""
+    return CAMEL_BOUNDARY.sub(' ', title).lower()
+
+def compile_keywords(keywords):
+    """One regex for a keyword list, finding every (possibly overlapping) match
+    
+    Long keywords match anywhere, like the old substring checks ("microbiology").
+    Short ones must start a word, so "ati" skips "education" and "test" skips
+    "latest", while "quizzes" and "examination" still match.
+    """
+    alternation = "|".join(re.escape(kw) if len(kw) > SHORT_KEYWORD else rf"(?<![a-z]){re.escape(kw)}"
+                           for kw in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"(?=({alternation}))")
+
+class MetadataClassifier:
+    """Subject and price rules compiled once, with results cached per title"""
+    
+    FREE_KEYWORDS = ['basic', 'intro', 'simple', 'overview', 'sample']
+    PREMIUM_KEYWORDS = ['comprehensive', 'complete', 'verified', 'actual', 'latest']
+    EXAM_KEYWORDS = ['exam', 'test', 'quiz', 'nclex', 'ati', 'hesi']
+    HEALTHCARE_KEYWORDS = ['nursing', 'medical', 'healthcare', 'nclex']
+    
+    def __init__(self, subject_mapping, default_subject="Programming"):
+        self.subject_mapping = dict(subject_mapping)
+        self.default_subject = default_subject
+        # Mapping order is the priority when a title matches several keywords
+        self.subject_priority = {kw: i for i, kw in enumerate(self.subject_mapping)}
+        self.subject_pattern = compile_keywords(self.subject_mapping)
+        self.free_pattern = compile_keywords(self.FREE_KEYWORDS)
+        self.premium_pattern = compile_keywords(self.PREMIUM_KEYWORDS)
+        self.exam_pattern = compile_keywords(self.EXAM_KEYWORDS)
+        self.healthcare_pattern = compile_keywords(self.HEALTHCARE_KEYWORDS)
+        self.cache = {}
+    
+    def subject(self, title):
+        return self.metadata(title)['subject']
+    
+    def price(self, title):
+        return self.metadata(title)['price']
+    
+    def metadata(self, title):
+        """Subject and price for one title (memoized)"""
+        result = self.cache.get(title)
+        if result is None:
+            result = self.cache[title] = self.compute(title)
+        return result
+    
+    def classify(self, titles):
+        """Metadata for many titles, e.g. a whole directory before any browser work"""
+        return [dict(self.metadata(title), title=title) for title in titles]
+    
+    def compute(self, title):
+        title_lower = split_words(title)
+        
+        keywords = self.subject_pattern.findall(title_lower)
+        if keywords:
+            subject = self.subject_mapping[min(keywords, key=self.subject_priority.__getitem__)]
+        else:
+            subject = self.default_subject
+        
+        return {'subject': subject, 'price': self.compute_price(title_lower)}
+    
+    def compute_price(self, title_lower):
+        # Free indicators
+        if self.free_pattern.search(title_lower):
+            return 0
+        
+        base_price = 7.99
+        
+        if self.premium_pattern.search(title_lower):
+            base_price += 3.00
+        
+        if self.exam_pattern.search(title_lower):
+            base_price += 2.00
+        
+        # Healthcare premium
+        if self.healthcare_pattern.search(title_lower):
+            base_price *= 1.2
+        
+        return round(base_price, 2)
+
+# Upper bound on simultaneous logged-in browser sessions for one account
+MAX_SESSIONS_PER_ACCOUNT = 3
+
+class UploadRateLimiter:
+    """Spaces form submissions for one account across every worker session"""
+    
+    def __init__(self, uploads_per_minute=30):
+        self.interval = 60.0 / uploads_per_minute
+        self.next_slot = 0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """Block until this caller's submission slot comes up"""
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
 class AcadeMeritUploaderV3:
     """Streamlined AcadeMerit uploader with persistent session"""
@@ -30,6 +323,19 @@ class AcadeMeritUploaderV3:
             'failed': 0,
             'start_time': time.time()
         }
+        self.stats_lock = threading.Lock()
+        self.journal = None
+        # Per-stage counters and latency histograms (shared with parallel workers)
+        self.metrics = Metrics('academerit_uploader')
+        self.session_expired = False
+        self.last_session_check = 0
+        # Only the primary session reads and writes SESSION_FILE; extra workers log in on their own
+        self.persist_session = True
+        
+        # Directory scan settings (see get_pdf_files)
+        self.scan_order = 'name'
+        self.name_pattern = '*.pdf'
+        self.shard = None  # (index, count)
         
         # Subject mapping for AcadeMerit
         self.subject_mapping = {
@@ -59,9 +365,11 @@ class AcadeMeritUploaderV3:
             'history': 'Humanities',
             'philosophy': 'Humanities'
         }
+        self.classifier = MetadataClassifier(self.subject_mapping)
     
     def setup_browser(self):
         """Setup Firefox with session persistence"""
+        started = time.perf_counter()
         try:
             options = FirefoxOptions()
             
@@ -85,6 +393,7 @@ class AcadeMeritUploaderV3:
             self.driver = webdriver.Firefox(options=options)
             self.driver.implicitly_wait(10)
             self.driver.set_page_load_timeout(30)
+            self.metrics.observe('browser_start_seconds', time.perf_counter() - started)
             
             print("✅ Firefox browser initialized successfully")
             return True
@@ -127,8 +436,91 @@ class AcadeMeritUploaderV3:
         
         return True
     
+    def session_cipher(self, salt):
+        """Fernet cipher keyed from the account credentials"""
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=390000)
+        secret = f"{self.credentials['email']}:{self.credentials['password']}".encode('utf-8')
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(secret)))
+    
+    def save_session(self):
+        """Persist the authenticated cookie jar and localStorage (owner-only, encrypted)"""
+        if Fernet is None:
+            return
+        try:
+            state = {
+                'saved_at': time.time(),
+                'cookies': self.driver.get_cookies(),
+                'local_storage': self.driver.execute_script("return Object.assign({}, window.localStorage);")
+            }
+            salt = os.urandom(SESSION_SALT_BYTES)
+            token = self.session_cipher(salt).encrypt(json.dumps(state).encode('utf-8'))
+            
+            # mkstemp creates the file 0600; os.replace swaps it in whole, so readers never see a partial file
+            with SESSION_FILE_LOCK:
+                fd, tmp_path = tempfile.mkstemp(dir=SESSION_FILE.parent, prefix=SESSION_FILE.name, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(salt + token)
+                    os.replace(tmp_path, SESSION_FILE)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            print("💾 Session saved")
+        except Exception as e:
+            print(f"⚠️  Could not save session: {e}")
+    
+    def restore_session(self):
+        """Load a saved session and confirm it with one request to the upload page"""
+        if Fernet is None or not SESSION_FILE.exists():
+            return False
+        try:
+            data = SESSION_FILE.read_bytes()
+            salt, token = data[:SESSION_SALT_BYTES], data[SESSION_SALT_BYTES:]
+            state = json.loads(self.session_cipher(salt).decrypt(token))
+        except (InvalidToken, ValueError, OSError):
+            print("⚠️  Saved session unreadable - logging in")
+            return False
+        
+        try:
+            # Cookies can only be set for the current origin; a tiny resource is enough
+            self.driver.get("https://academerit.com/favicon.ico")
+            now = time.time()
+            for cookie in state['cookies']:
+                if cookie.get('expiry') and cookie['expiry'] < now:
+                    continue
+                try:
+                    self.driver.add_cookie(cookie)
+                except WebDriverException:
+                    continue
+            self.driver.execute_script(
+                "var items = arguments[0];"
+                "for (var key in items) { window.localStorage.setItem(key, items[key]); }",
+                state.get('local_storage') or {}
+            )
+            
+            # One real request: an expired session is redirected to /login
+            self.driver.get("https://academerit.com/study-notes/create")
+            if self.validate_session():
+                return True
+        except WebDriverException as e:
+            print(f"⚠️  Could not restore session: {e}")
+        
+        print("🔐 Saved session expired - logging in")
+        return False
+    
     def login(self):
         """Login to AcadeMerit with session validation"""
+        # Skip the login form when a saved session is still valid
+        restored = False
+        if self.persist_session:
+            with self.metrics.timer('login_seconds', method='restore'):
+                restored = self.restore_session()
+        if restored:
+            print("✅ Restored saved session")
+            self.metrics.inc('logins', method='restore')
+            return True
+        
+        started = time.perf_counter()
         try:
             print("🔐 Logging into AcadeMerit...")
             self.driver.get("https://academerit.com/login")
@@ -166,6 +558,10 @@ class AcadeMeritUploaderV3:
             # Validate login success
             if self.validate_session():
                 print("✅ Login successful!")
+                self.metrics.observe('login_seconds', time.perf_counter() - started, method='form')
+                self.metrics.inc('logins', method='form')
+                if self.persist_session:
+                    self.save_session()
                 return True
             else:
                 # Check for error messages
@@ -181,74 +577,39 @@ class AcadeMeritUploaderV3:
             return False
     
     def validate_session(self):
-        """Multi-check session validation"""
+        """Full session check (URL plus logged-in elements) in a single script call"""
         try:
-            # Check 1: Not on login page
-            if "/login" in self.driver.current_url:
-                return False
-            
-            # Check 2: Look for authenticated user elements
-            auth_indicators = [
-                ".navbar-nav",
-                "a[href*='logout']",
-                ".user-menu",
-                "[data-user]"
-            ]
-            
-            for indicator in auth_indicators:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, indicator)
-                    if elements and any(el.is_displayed() for el in elements):
-                        return True
-                except:
-                    continue
-            
-            return False
-            
+            valid = bool(self.driver.execute_script(SESSION_STATE_SCRIPT, AUTH_INDICATORS))
         except Exception:
+            valid = False
+        self.metrics.inc('session_checks', valid=str(valid).lower())
+        
+        self.session_expired = not valid
+        if valid:
+            self.last_session_check = time.time()
+        return valid
+    
+    def session_ok(self):
+        """Cheap pre-upload check; the full check runs only periodically"""
+        if self.session_expired:
             return False
+        if time.time() - self.last_session_check < SESSION_CHECK_INTERVAL:
+            return True
+        return self.validate_session()
     
     def detect_subject(self, title):
         """Detect subject from filename"""
-        title_lower = title.lower()
-        
-        for keyword, subject in self.subject_mapping.items():
-            if keyword in title_lower:
-                return subject
-        
-        return "Programming"  # Default fallback
+        return self.classifier.subject(title)
     
     def calculate_price(self, title):
         """Calculate intelligent pricing"""
-        title_lower = title.lower()
-        
-        # Free indicators
-        free_keywords = ['basic', 'intro', 'simple', 'overview', 'sample']
-        if any(kw in title_lower for kw in free_keywords):
-            return 0
-        
-        # Premium indicators
-        premium_keywords = ['comprehensive', 'complete', 'verified', 'actual', 'latest']
-        exam_keywords = ['exam', 'test', 'quiz', 'nclex', 'ati', 'hesi']
-        
-        base_price = 7.99
-        
-        if any(kw in title_lower for kw in premium_keywords):
-            base_price += 3.00
-        
-        if any(kw in title_lower for kw in exam_keywords):
-            base_price += 2.00
-        
-        # Healthcare premium
-        if any(kw in title_lower for kw in ['nursing', 'medical', 'healthcare', 'nclex']):
-            base_price *= 1.2
-        
-        return round(base_price, 2)
+        return self.classifier.price(title)
     
     def upload_file(self, file_path):
         """Upload single file with error handling"""
         try:
             print(f"\n📤 Uploading: {file_path.name}")
+            stage_start = time.perf_counter()
             
             # Navigate to upload page
             self.driver.get("https://academerit.com/study-notes/create")
@@ -256,10 +617,11 @@ class AcadeMeritUploaderV3:
             # Check if redirected to login (session expired)
             if "/login" in self.driver.current_url:
                 print("❌ Session expired - login required")
+                self.session_expired = True
                 return False
             
-            # Wait for upload form
-            WebDriverWait(self.driver, 20).until(
+            # Wait for upload form (the located elements come back in order)
+            form_elements = WebDriverWait(self.driver, 20).until(
                 EC.all_of(
                     EC.presence_of_element_located((By.NAME, "title")),
                     EC.presence_of_element_located((By.NAME, "description")),
@@ -268,160 +630,244 @@ class AcadeMeritUploaderV3:
                 )
             )
             
+            self.metrics.observe('upload_page_load_seconds', time.perf_counter() - stage_start)
+            stage_start = time.perf_counter()
+            
             # Extract title and detect metadata
             title = file_path.stem[:255]  # Respect max length
             subject = self.detect_subject(title)
             price = self.calculate_price(title)
             
-            # Fill form fields
-            self.driver.find_element(By.NAME, "title").send_keys(title)
+            # Fill every non-file field in one round-trip
+            payload = {
+                'title': title,
+                'description': f"Study material: {title}\n\nEducational content for academic purposes."[:2000],
+                'subject': subject,
+                'price': price
+            }
+            subject_used, subject_fallback, price_used = self.driver.execute_script(FORM_FILL_SCRIPT, payload)
             
-            description = f"Study material: {title}\n\nEducational content for academic purposes."
-            self.driver.find_element(By.NAME, "description").send_keys(description[:2000])
+            if subject_fallback and subject_used:
+                print(f"📋 Subject (fallback): {subject_used}")
+            elif subject_used:
+                print(f"📋 Subject: {subject_used}")
             
-            # Select subject
-            subject_dropdown = Select(self.driver.find_element(By.NAME, "subject_id"))
-            try:
-                subject_dropdown.select_by_visible_text(subject)
-                print(f"📋 Subject: {subject}")
-            except:
-                # Fallback to first available option
-                options = [opt.text for opt in subject_dropdown.options if opt.text.strip()]
-                if len(options) > 1:
-                    subject_dropdown.select_by_visible_text(options[1])
-                    print(f"📋 Subject (fallback): {options[1]}")
-            
-            # Handle pricing
-            is_free_checkbox = self.driver.find_element(By.NAME, "is_free")
-            
-            if price == 0:
-                if not is_free_checkbox.is_selected():
-                    is_free_checkbox.click()
+            if price_used is None and price != 0:
+                print("💰 Price: FREE (fallback)")
+            elif not price_used:
                 print("💰 Price: FREE")
             else:
-                if is_free_checkbox.is_selected():
-                    is_free_checkbox.click()
-                
-                try:
-                    price_field = self.driver.find_element(By.NAME, "price")
-                    price_field.clear()
-                    price_field.send_keys(str(price))
-                    print(f"💰 Price: ${price}")
-                except NoSuchElementException:
-                    # Price field might not be visible, set as free
-                    if not is_free_checkbox.is_selected():
-                        is_free_checkbox.click()
-                    print("💰 Price: FREE (fallback)")
+                print(f"💰 Price: ${price_used}")
             
             # Upload file
-            file_input = self.driver.find_element(By.NAME, "file")
+            file_input = form_elements[3]
             file_input.send_keys(str(file_path.absolute()))
             print("📁 File attached")
             
             # Submit form
             submit_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
+            if self.journal:
+                self.journal.mark(file_path, 'submitted')
             submit_button.click()
             print("🚀 Form submitted")
+            self.metrics.observe('upload_form_seconds', time.perf_counter() - stage_start)
             
             # Wait for upload completion
-            return self.wait_for_upload_completion()
+            with self.metrics.timer('upload_confirm_seconds'):
+                return self.wait_for_upload_completion()
             
         except Exception as e:
             print(f"❌ Upload error: {e}")
             return False
     
     def wait_for_upload_completion(self, timeout=300):
-        """Wait for upload to complete with multiple detection methods"""
+        """Wait for upload to complete, polling fast at first and backing off"""
         start_time = time.time()
+        interval = 0.25
         
         while time.time() - start_time < timeout:
             try:
-                current_url = self.driver.current_url
-                
-                # Method 1: Successful redirect to study note page
-                if "/study-notes/" in current_url and "/create" not in current_url:
-                    print("✅ Upload successful - redirected to study note page")
-                    return True
-                
-                # Method 2: Success alert message
-                success_alerts = self.driver.find_elements(By.CSS_SELECTOR, ".alert-success")
-                if any(alert.is_displayed() for alert in success_alerts):
-                    print("✅ Upload successful - success message detected")
-                    return True
-                
-                # Method 3: Error detection
-                error_alerts = self.driver.find_elements(By.CSS_SELECTOR, ".alert-danger, .invalid-feedback")
-                visible_errors = [el for el in error_alerts if el.is_displayed() and el.text.strip()]
-                if visible_errors:
-                    error_msg = visible_errors[0].text
-                    print(f"❌ Upload failed: {error_msg}")
-                    return False
-                
-                # Method 4: Still on create page after long time = likely failed
-                if time.time() - start_time > 60 and "/create" in current_url:
-                    print("❌ Upload timeout - still on create page")
-                    return False
-                
-                time.sleep(2)
-                
-            except Exception:
-                continue
+                state, detail = self.driver.execute_script(UPLOAD_STATE_SCRIPT)
+            except WebDriverException:
+                # Page is mid-navigation; check again shortly
+                state, detail = 'pending', ''
+            
+            # Method 1: Successful redirect to study note page
+            if state == 'redirect':
+                print("✅ Upload successful - redirected to study note page")
+                return True
+            
+            # Method 2: Success alert message
+            if state == 'success':
+                print("✅ Upload successful - success message detected")
+                return True
+            
+            # Method 3: Error detection
+            if state == 'error':
+                print(f"❌ Upload failed: {detail}")
+                return False
+            
+            # Method 4: Still on create page after long time = likely failed
+            if time.time() - start_time > 60 and "/create" in detail:
+                print("❌ Upload timeout - still on create page")
+                return False
+            
+            time.sleep(interval)
+            interval = min(interval * 1.5, 2.0)
         
         print("❌ Upload timeout - no completion detected")
         return False
     
     def get_pdf_files(self):
-        """Get list of PDF files to upload"""
-        if not self.renamed_files_dir.exists():
+        """Yield PDF files in a stable order, restricted to this process's shard"""
+        try:
+            scanner = os.scandir(self.renamed_files_dir)
+        except FileNotFoundError:
             print(f"❌ Directory not found: {self.renamed_files_dir}")
-            return []
+            return
+        
+        # Only names (and mtimes) are held; Path objects are built as files are consumed
+        by_mtime = self.scan_order == 'mtime'
+        entries = []
+        with scanner:
+            for entry in scanner:
+                if not fnmatch.fnmatchcase(entry.name, self.name_pattern):
+                    continue
+                if self.shard and zlib.crc32(entry.name.encode('utf-8')) % self.shard[1] != self.shard[0]:
+                    continue
+                if not by_mtime:
+                    # Name order needs no stat; files are checked as they are taken (see usable_file)
+                    entries.append((entry.name, entry.name))
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    info = entry.stat()
+                except OSError:
+                    continue
+                if info.st_size == 0:
+                    continue
+                entries.append(((info.st_mtime_ns, entry.name), entry.name))
+        
+        entries.sort()
+        shard = f" (shard {self.shard[0]}/{self.shard[1]})" if self.shard else ""
+        print(f"📁 Found {len(entries)} PDF files{shard}")
+        self.found_files = len(entries)
+        
+        for _, name in entries:
+            file_path = self.renamed_files_dir / name
+            if by_mtime or self.usable_file(file_path):
+                yield file_path
+    
+    @staticmethod
+    def usable_file(file_path):
+        """Regular, non-empty file (one stat)"""
+        try:
+            info = file_path.stat()
+        except OSError:
+            return False
+        return stat.S_ISREG(info.st_mode) and info.st_size > 0
+    
+    def pending_files(self, pdf_files):
+        """Yield files the journal has not seen through, without touching the site"""
+        self.journal = UploadJournal(UPLOAD_JOURNAL_FILE)
+        self.skipped_files = 0
+        self.unconfirmed_files = []
+        for file_path in pdf_files:
+            state = self.journal.state(file_path)
+            if state == 'confirmed':
+                self.skipped_files += 1
+                continue
+            if state == 'submitted':
+                self.unconfirmed_files.append(file_path)  # May already be on the site
+                continue
+            yield file_path
+    
+    def select_files(self, limit=None):
+        """Take the next pending files, scanning and hashing only as far as needed"""
+        self.found_files = 0
+        # pending_files sets these as it runs, but islice(..., 0) never starts it
+        self.skipped_files = 0
+        self.unconfirmed_files = []
+        pdf_files = list(itertools.islice(self.pending_files(self.get_pdf_files()), limit))
         
-        pdf_files = list(self.renamed_files_dir.glob("*.pdf"))
-        print(f"📁 Found {len(pdf_files)} PDF files")
+        if self.skipped_files:
+            print(f"⏭️  Skipping {self.skipped_files} files already uploaded (journal)")
+        if self.unconfirmed_files:
+            print(f"⚠️  {len(self.unconfirmed_files)} files were submitted without confirmation - check them manually:")
+            for file_path in self.unconfirmed_files:
+                print(f"   {file_path.name}")
         return pdf_files
     
-    def upload_batch(self, batch_size=5, max_files=None):
-        """Upload files in batches"""
-        pdf_files = self.get_pdf_files()
+    def plan_batch(self, max_files=None):
+        """Print the subject and price each pending file would get, without a browser"""
+        pdf_files = self.select_files(max_files)
         
-        if not pdf_files:
-            print("❌ No PDF files found")
-            return
+        plan = self.classifier.classify([file_path.stem[:255] for file_path in pdf_files])
+        for file_path, entry in zip(pdf_files, plan):
+            price = "FREE" if entry['price'] == 0 else f"${entry['price']}"
+            print(f"{entry['subject']:<12} {price:>7}  {file_path.name}")
         
+        subjects = {}
+        for entry in plan:
+            subjects[entry['subject']] = subjects.get(entry['subject'], 0) + 1
+        print("=" * 60)
+        print(f"📋 {len(plan)} files planned: " +
+              ", ".join(f"{subject} {count}" for subject, count in sorted(subjects.items())))
+        return plan
+    
+    def select_batch(self, batch_size=5, max_files=None):
+        """Pending files for one batch; empty (with the reason printed) when there is nothing to do"""
         # Limit files if specified
-        if max_files:
-            pdf_files = pdf_files[:max_files]
+        limit = min(batch_size, max_files) if max_files else batch_size
+        pdf_files = self.select_files(limit)
+        
+        if not self.found_files:
+            print("❌ No PDF files found")
+            return []
+        if not pdf_files:
+            print("✅ Nothing left to upload")
+            return []
+        return pdf_files
+    
+    def upload_batch(self, batch_size=5, max_files=None, workers=1, uploads_per_minute=30, pdf_files=None):
+        """Upload files in batches (pdf_files: a batch already taken with select_batch)"""
+        if pdf_files is None:
+            pdf_files = self.select_batch(batch_size, max_files)
+        if not pdf_files:
+            return
         
-        self.upload_stats['total_files'] = min(len(pdf_files), batch_size)
+        for file_path in pdf_files:
+            self.journal.mark(file_path, 'queued')
+        self.upload_stats['total_files'] = len(pdf_files)
         uploaded_files = []
         failed_files = []
         
         print(f"🚀 Starting upload of {self.upload_stats['total_files']} files")
         print("=" * 60)
         
-        for i, file_path in enumerate(pdf_files[:batch_size]):
-            print(f"\n📤 Processing file {i+1}/{self.upload_stats['total_files']}")
-            
-            # Verify session before each upload
-            if not self.validate_session():
-                print("❌ Session lost - stopping uploads")
-                break
-            
-            # Upload file
-            success = self.upload_file(file_path)
-            
-            if success:
-                uploaded_files.append(file_path)
-                self.upload_stats['uploaded'] += 1
-                print(f"✅ Success: {file_path.name}")
-            else:
-                failed_files.append(file_path)
-                self.upload_stats['failed'] += 1
-                print(f"❌ Failed: {file_path.name}")
-            
-            # Brief pause between uploads
-            if i < len(pdf_files[:batch_size]) - 1:
-                time.sleep(2)
+        workers = min(workers, MAX_SESSIONS_PER_ACCOUNT, len(pdf_files))
+        if workers > 1:
+            self.upload_parallel(pdf_files, workers, uploads_per_minute, uploaded_files, failed_files)
+        else:
+            for i, file_path in enumerate(pdf_files):
+                print(f"\n📤 Processing file {i+1}/{self.upload_stats['total_files']}")
+                
+                # Cheap session check; upload_file flags a /login redirect itself
+                if not self.session_ok():
+                    print("❌ Session lost - stopping uploads")
+                    break
+                
+                # Upload file
+                success = self.upload_file(file_path)
+                if self.session_expired:
+                    print("❌ Session lost - stopping uploads")
+                    break
+                self.record_result(file_path, success, uploaded_files, failed_files)
+                
+                # Brief pause between uploads
+                if i < len(pdf_files) - 1:
+                    time.sleep(2)
         
         # Summary
         elapsed = time.time() - self.upload_stats['start_time']
@@ -436,6 +882,87 @@ class AcadeMeritUploaderV3:
         # Save log
         self.save_log(uploaded_files, failed_files)
     
+    def record_result(self, file_path, success, uploaded_files, failed_files, tag=""):
+        """Thread-safe bookkeeping for one finished upload"""
+        if self.journal:
+            self.journal.mark(file_path, 'confirmed' if success else 'failed')
+        self.metrics.inc('uploads', result='success' if success else 'failed')
+        
+        with self.stats_lock:
+            if success:
+                uploaded_files.append(file_path)
+                self.upload_stats['uploaded'] += 1
+            else:
+                failed_files.append(file_path)
+                self.upload_stats['failed'] += 1
+        
+        if success:
+            print(f"✅ {tag}Success: {file_path.name}")
+        else:
+            print(f"❌ {tag}Failed: {file_path.name}")
+    
+    def upload_parallel(self, pdf_files, workers, uploads_per_minute, uploaded_files, failed_files):
+        """Upload from a shared queue with several independently logged-in browser sessions"""
+        file_queue = queue.Queue()
+        for file_path in pdf_files:
+            file_queue.put(file_path)
+        
+        rate_limiter = UploadRateLimiter(uploads_per_minute)
+        print(f"👥 Using {workers} browser sessions, max {uploads_per_minute} uploads/minute")
+        
+        def run_worker(worker_id):
+            tag = f"[worker {worker_id}] "
+            # Worker 1 reuses the session that is already logged in
+            if worker_id == 1:
+                uploader = self
+            else:
+                uploader = AcadeMeritUploaderV3(self.renamed_files_dir)
+                uploader.debug_mode = getattr(self, 'debug_mode', False)
+                uploader.credentials = self.credentials
+                uploader.journal = self.journal
+                uploader.metrics = self.metrics
+                uploader.persist_session = False  # Its own server session, not a copy of ours
+                if not (uploader.setup_browser() and uploader.login()):
+                    print(f"❌ {tag}Could not start session")
+                    uploader.cleanup()
+                    return
+            
+            try:
+                while True:
+                    try:
+                        file_path = file_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    
+                    # Cheap session check; upload_file flags a /login redirect itself
+                    if not uploader.session_ok():
+                        print(f"❌ {tag}Session lost - worker stopping")
+                        file_queue.put(file_path)  # Let another session take it
+                        break
+                    
+                    with self.metrics.timer('rate_limit_wait_seconds'):
+                        rate_limiter.wait()
+                    print(f"\n📤 {tag}Processing: {file_path.name}")
+                    success = uploader.upload_file(file_path)
+                    if uploader.session_expired:
+                        print(f"❌ {tag}Session lost - worker stopping")
+                        file_queue.put(file_path)  # Never submitted, let another session take it
+                        break
+                    self.record_result(file_path, success, uploaded_files, failed_files, tag)
+            finally:
+                if uploader is not self:
+                    uploader.cleanup()
+        
+        threads = [threading.Thread(target=run_worker, args=(i,), daemon=True)
+                   for i in range(1, workers + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        if not file_queue.empty():
+            print(f"⚠️  {file_queue.qsize()} files not attempted - no working sessions left")
+    
     def move_uploaded_files(self, uploaded_files):
         """Move uploaded files to uploaded subdirectory"""
         uploaded_dir = self.renamed_files_dir / "uploaded"
@@ -486,6 +1013,18 @@ def main():
     parser.add_argument("--max-files", type=int, help="Limit total files to upload")
     parser.add_argument("--debug", action="store_true", help="Show browser window")
     parser.add_argument("--dir", default="../downloaded_files/renamed", help="Files directory")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Parallel browser sessions (max {MAX_SESSIONS_PER_ACCOUNT})")
+    parser.add_argument("--uploads-per-minute", type=int, default=30,
+                        help="Account-wide submission rate limit for parallel sessions")
+    parser.add_argument("--order", choices=["name", "mtime"], default="name",
+                        help="Upload order within the directory")
+    parser.add_argument("--match", default="*.pdf", help="Filename pattern to upload")
+    parser.add_argument("--shard", help="Take only shard I of N (e.g. 0/3) so several processes can split a directory")
+    parser.add_argument("--metrics", default="upload_metrics.json",
+                        help="Write run metrics here at exit (*.prom for Prometheus text, otherwise JSON)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Show detected subject and price per file, then exit without uploading")
     
     args = parser.parse_args()
     
@@ -495,8 +1034,27 @@ def main():
     
     uploader = AcadeMeritUploaderV3(args.dir)
     uploader.debug_mode = args.debug
+    uploader.scan_order = args.order
+    uploader.name_pattern = args.match
+    if args.shard:
+        try:
+            index, count = (int(part) for part in args.shard.split("/"))
+        except ValueError:
+            parser.error(f"--shard must be I/N, e.g. 0/3 (got {args.shard!r})")
+        if not 0 <= index < count:
+            parser.error("--shard must be I/N with 0 <= I < N")
+        uploader.shard = (index, count)
+    
+    if args.plan:
+        uploader.plan_batch(args.max_files)
+        return
     
     try:
+        # Pick the batch first, so an empty directory never starts a browser or logs in
+        pdf_files = uploader.select_batch(args.batch_size, args.max_files)
+        if not pdf_files:
+            return
+        
         # Setup
         if not uploader.setup_browser():
             return
@@ -509,7 +1067,7 @@ def main():
             return
         
         # Upload files
-        uploader.upload_batch(args.batch_size, args.max_files)
+        uploader.upload_batch(args.batch_size, args.max_files, args.workers, args.uploads_per_minute, pdf_files)
         
     except KeyboardInterrupt:
         print("\n⏹️  Upload cancelled")
@@ -517,6 +1075,9 @@ def main():
         print(f"❌ Error: {e}")
     finally:
         uploader.cleanup()
+        if args.metrics:
+            uploader.metrics.write(args.metrics)
+            print(f"📈 Metrics saved to: {args.metrics}")
 
 if __name__ == "__main__":
     main()